@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Benchmarks of the protocol hot paths.
+
+    $ python benchmarks/protocol.py --output results.json
+
+Results are printed and, with --output, written as JSON (one entry per benchmark, rates in operations per second
+and times in microseconds) so runs on different commits can be compared, e.g. with --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pynextion.commands import CommandBase, GetPropertyCommand  # noqa: E402
+from pynextion.device import NexDevice  # noqa: E402
+from pynextion.events import MsgEvent  # noqa: E402
+from pynextion.hardware import AbstractSerialNex  # noqa: E402
+from pynextion.simulator import NexSimulator, SimulatedNex  # noqa: E402
+
+FRAMES = {
+    "ack": b'\x01\xff\xff\xff',
+    "launched": b'\x88\xff\xff\xff',
+    "touch": b'\x65\x00\x02\x01\xff\xff\xff',
+    "current_page": b'\x66\x02\xff\xff\xff',
+    "position": b'\x67\x00\x7a\x00\x1e\x01\xff\xff\xff',
+    "sleep_position": b'\x68\x00\x7a\x00\x1e\x01\xff\xff\xff',
+    "string": b'\x70' + b'x' * 32 + b'\xff\xff\xff',
+    "number": b'\x71\x39\x30\x00\x00\xff\xff\xff',
+    "startup": b'\x00\x00\x00\xff\xff\xff',
+}
+
+
+def bench(function, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """ Time function, return the best of `repeat` runs """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat, number)) / number
+    return {"ops_per_sec": 1.0 / best, "time_us": best * 1e6}
+
+
+def bench_parse(results: dict):
+    for name, frame in FRAMES.items():
+        view = memoryview(bytearray(frame))
+        results["parse.%s" % name] = bench(lambda view=view: MsgEvent.parse(view))
+        results["decode.%s" % name] = bench(lambda view=view: MsgEvent.decode(view))
+
+
+def bench_format_command(results: dict):
+    results["format_command.plain"] = bench(lambda: CommandBase.format_command("get n0.val"))
+    results["format_command.params"] = bench(lambda: CommandBase.format_command("fill", 10, 20, 100, 50, 63488))
+
+
+class BufferPort(object):
+    """ Port returning a preloaded buffer, to measure read_next() alone (pyserial loop:// queues single bytes) """
+
+    def __init__(self):
+        self.data = memoryview(b'')
+        self.pos = 0
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.data) - self.pos
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.in_waiting)
+        buffer[:size] = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return size
+
+
+class BufferNex(AbstractSerialNex):
+    def __init__(self):
+        super().__init__()
+        self.sp = BufferPort()
+
+
+def bench_read_next(results: dict, frames: int = 10000):
+    """ Split a large buffer holding all frame types """
+    mixed = b''.join(FRAMES.values())
+    repeat = frames // len(FRAMES)
+    data = mixed * repeat
+    transport = BufferNex()
+
+    def run():
+        transport.sp.data = memoryview(data)
+        transport.sp.pos = 0
+        while transport.read_next():
+            pass
+
+    result = bench(run, repeat=3)
+    result["frames_per_sec"] = result["ops_per_sec"] * repeat * len(FRAMES)
+    result["bytes_per_sec"] = result["ops_per_sec"] * len(data)
+    results["read_next.mixed"] = result
+
+
+def _simulated_device(baudrate: int, timed: bool, max_in_flight: int):
+    simulator = NexSimulator(baudrate=baudrate, timed=timed)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "n0", 1, val=0)
+    simulator.add_component(0, "b0", 2, txt="OK")
+    device = NexDevice(SimulatedNex(simulator), max_in_flight=max_in_flight)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widgets((("number", "n0", 1), ("button", "b0", 2)))
+    device.init()
+    return simulator, device, page
+
+
+def bench_poll(results: dict, commands: int = 2000):
+    """ Commands per second through NexDevice.poll, limited by the CPU (instantaneous link) or by the link """
+    for label, baudrate, timed in (("cpu", 115200, False), ("115200", 115200, True), ("921600", 921600, True)):
+        for max_in_flight in (1, 8):
+            _, device, page = _simulated_device(baudrate, timed, max_in_flight)
+            count = commands if not timed else commands // 10
+            start = time.perf_counter()
+            for _ in range(count):
+                device._on_enqueue_command(GetPropertyCommand("n0", "val"))
+            while not device.poll():
+                pass
+            elapsed = time.perf_counter() - start
+            results["poll.%s.in_flight_%d" % (label, max_in_flight)] = {
+                "commands_per_sec": count / elapsed,
+                "time_us": elapsed / count * 1e6,
+            }
+
+
+def bench_touch_latency(results: dict, touches: int = 200):
+    """ Time from the touch event leaving the display to the pressed signal, on a 115200 baud link """
+    simulator, device, page = _simulated_device(115200, True, 1)
+    latencies = []
+    received = []
+    page["b0"].pressed.connect(lambda: received.append(time.perf_counter()))
+    for _ in range(touches):
+        start = time.perf_counter()
+        simulator.touch("b0")
+        while not received:
+            device.poll()
+        latencies.append(received.pop() - start)
+    latencies.sort()
+    results["touch_latency.115200"] = {
+        "mean_us": sum(latencies) / len(latencies) * 1e6,
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "format_command": bench_format_command,
+    "read_next": bench_read_next,
+    "poll": bench_poll,
+    "touch_latency": bench_touch_latency,
+}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, results: dict):
+    """ Print the change of the main figure of each benchmark against a previous run """
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        key = next(iter(result))
+        change = (result[key] / previous[key] - 1.0) * 100.0
+        print("{:40} {:>14} {:+8.1f}%".format(name, key, change))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*",
+                        help="Benchmarks to run, among {} (default: all)".format(", ".join(BENCHMARKS)))
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument("--compare", "-c", help="Compare with the results in this JSON file")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("Unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+
+    results = {}
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](results)
+
+    for name, result in results.items():
+        print("{:40} {}".format(name, "  ".join("{}={:.1f}".format(key, value) for key, value in result.items())))
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+
+from PyQt5.QtCore import pyqtSlot
+
+from .commands import CommandBase
+from .device import NexDevice
+
+__all__ = ['AsyncNexDevice']
+
+
+class AsyncNexDevice(NexDevice):
+    """ NexDevice driven by an asyncio event loop instead of a NexEventPoller thread.
+        Incoming data is processed as soon as the serial port becomes readable (loop.add_reader) and enqueued
+        commands are sent on the next loop iteration. Commands are awaitable, so for instance:
+
+        >>> value = await device["page0"]["n0"].get("val")
+
+        The transport must expose a selectable file descriptor through fileno().
+    """
+
+    def __init__(self, transport, parent=None, loop: asyncio.AbstractEventLoop = None, **kwargs):
+        super().__init__(transport, parent, **kwargs)
+        self._logger = logging.getLogger("pynextion.AsyncNexDevice")
+        self._loop = loop
+        self._fileno = None
+        self._poll_handle = None
+        self._refresh_handle = None
+
+    @property
+    def running(self) -> bool:
+        return self._fileno is not None
+
+    def start(self):
+        """ Start processing events in the event loop. Call init() first, if needed. """
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        self._fileno = self.transport.fileno()
+        self._loop.add_reader(self._fileno, self._poll)
+        self._schedule_poll()
+        self._logger.info("Started Nextion event processing on fd %d", self._fileno)
+
+    def stop(self):
+        if self._fileno is None:
+            return
+        self._loop.remove_reader(self._fileno)
+        self._fileno = None
+        for handle in (self._poll_handle, self._refresh_handle):
+            if handle is not None:
+                handle.cancel()
+        self._poll_handle = self._refresh_handle = None
+        self._logger.info("Stopped Nextion event processing")
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _schedule_poll(self):
+        """ Coalesce poll requests (e.g. many commands enqueued at once) in a single call on the next iteration """
+        if self._poll_handle is None:
+            self._poll_handle = self._loop.call_soon(self._on_scheduled_poll)
+
+    def _on_scheduled_poll(self):
+        self._poll_handle = None
+        self._poll()
+
+    def _on_refresh_due(self):
+        self._refresh_handle = None
+        self._poll()
+
+    def _poll(self):
+        idle = self.poll()
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if idle and self.running:
+            delay = self.next_refresh_delay()
+            if delay is not None:
+                self._refresh_handle = self._loop.call_later(delay, self._on_refresh_due)
+
+    @pyqtSlot(CommandBase)
+    def _on_enqueue_command(self, command):
+        super()._on_enqueue_command(command)
+        if self.running:
+            self._schedule_poll()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import io
+import struct
+import threading
+import time
+import typing
+
+from .hardware import AbstractSerialNex
+
+__all__ = ['RecordingNex', 'ReplayNex', 'read_capture']
+
+MAGIC = b'NXCAP\x01'
+" Capture file header: format identifier and version "
+
+WRITTEN = 0
+" Record direction: bytes written to the display "
+READ = 1
+" Record direction: bytes read from the display "
+
+_RECORD = struct.Struct("<dBI")
+" Record header: seconds since the capture start, direction, payload size "
+
+
+def _open(file, mode: str):
+    """ Return (binary file object, whether it must be closed by us) """
+    if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+        return open(file, mode), True
+    return file, False
+
+
+def read_capture(file) -> typing.Iterator[typing.Tuple[float, int, bytes]]:
+    """ Iterate over the (timestamp, direction, data) records of a capture (a path or a binary file object) """
+    f, owned = _open(file, "rb")
+    try:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a pynextion capture")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            timestamp, direction, size = _RECORD.unpack(header)
+            yield timestamp, direction, f.read(size)
+    finally:
+        if owned:
+            f.close()
+
+
+class CaptureWriter(object):
+    def __init__(self, file, clock: typing.Callable[[], float] = time.monotonic):
+        self._file, self._owned = _open(file, "wb")
+        self._file.write(MAGIC)
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+
+    def record(self, direction: int, data: bytes):
+        if not data:
+            return
+        with self._lock:
+            self._file.write(_RECORD.pack(self._clock() - self._started, direction, len(data)))
+            self._file.write(data)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            if self._owned:
+                self._file.close()
+
+
+class RecordingPort(object):
+    """ Proxy of a serial.Serial, recording everything written and read """
+
+    def __init__(self, sp, writer: CaptureWriter):
+        self._sp = sp
+        self._writer = writer
+
+    def write(self, data) -> int:
+        nbytes = self._sp.write(data)
+        self._writer.record(WRITTEN, bytes(data[:nbytes] if nbytes is not None else data))
+        return nbytes
+
+    def read(self, size: int = 1) -> bytes:
+        data = self._sp.read(size)
+        self._writer.record(READ, data)
+        return data
+
+    def read_all(self) -> bytes:
+        data = self._sp.read_all()
+        self._writer.record(READ, data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        nbytes = self._sp.readinto(buffer)
+        self._writer.record(READ, bytes(buffer[:nbytes]))
+        return nbytes
+
+    def close(self):
+        self._writer.close()
+        return self._sp.close()
+
+    def __getattr__(self, name):
+        return getattr(self._sp, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            # e.g. baudrate
+            setattr(self._sp, name, value)
+
+
+class RecordingNex(AbstractSerialNex):
+    """ Transport recording the traffic of the port of another transport, with timestamps, in a compact binary file
+        (see read_capture() for the format), e.g.
+
+        >>> transport = RecordingNex(PySerialNex("/dev/ttyUSB0", baudrate=115200), "session.nxcap")
+
+        The wrapped transport must not be used directly any more.
+    """
+
+    def __init__(self, transport: AbstractSerialNex, file, clock: typing.Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.writer = CaptureWriter(file, clock)
+        self.sp = RecordingPort(transport.sp, self.writer)
+
+
+class ReplayPort(object):
+    """ The subset of the serial.Serial interface used by AbstractSerialNex, returning recorded data """
+
+    def __init__(self, records: typing.Iterable[typing.Tuple[float, int, bytes]], speed: typing.Union[float, None],
+                 clock: typing.Callable[[], float]):
+        self.baudrate = None
+        self.speed = speed
+        self.clock = clock
+        self.written = bytearray()
+        self.expected = bytearray()
+        # (timestamp, bytes written before in the capture, data) of incoming data
+        self._incoming = collections.deque()
+        self._pending = bytearray()
+        self._started = None
+        for timestamp, direction, data in records:
+            if direction == WRITTEN:
+                self.expected += data
+            else:
+                self._incoming.append((timestamp, len(self.expected), data))
+
+    @property
+    def finished(self) -> bool:
+        """ True if all recorded incoming data has been read """
+        return not self._incoming and not self._pending
+
+    def _release(self):
+        """ Move the incoming data which is due to _pending """
+        if self._started is None:
+            self._started = self.clock()
+        elapsed = self.clock() - self._started
+        while self._incoming:
+            timestamp, written_before, data = self._incoming[0]
+            # Never answer before the host has sent what it sent in the capture
+            if len(self.written) < written_before:
+                break
+            if self.speed is not None and timestamp / self.speed > elapsed:
+                break
+            self._pending += data
+            self._incoming.popleft()
+
+    @property
+    def in_waiting(self) -> int:
+        self._release()
+        return len(self._pending)
+
+    def write(self, data) -> int:
+        if self._started is None:
+            self._started = self.clock()
+        self.written += data
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        self._release()
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def read_all(self) -> bytes:
+        return self.read(self.in_waiting)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        pass
+
+    def fileno(self) -> int:
+        raise io.UnsupportedOperation("A replay has no file descriptor")
+
+    def close(self):
+        pass
+
+
+class ReplayNex(AbstractSerialNex):
+    """ Transport feeding a capture made with RecordingNex back to a NexDevice.
+
+        Incoming data is released at the recorded pace (divided by `speed`) but never before the host has written as
+        many bytes as it had at that point of the capture, so the session stays in step with the commands sent.
+        With speed=None timing is ignored, which makes the replay deterministic and as fast as possible (e.g. for
+        throughput benchmarks and regression tests).
+        Everything written is kept in `sp.written`, to be compared with the recorded `sp.expected`.
+    """
+
+    def __init__(self, file, speed: typing.Union[float, None] = 1.0,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.sp = ReplayPort(read_capture(file), speed, clock)
+
+    @property
+    def finished(self) -> bool:
+        return self.sp.finished
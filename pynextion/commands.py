@@ -1,19 +1,59 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import time
+import typing
+
 from enum import Enum
 
-from PyQt5.QtCore import pyqtSignal, QObject
+from .events import AbstractMsgEvent, CommandSucceeded, CurrentPageIDHeadEvent, StringHeadEvent, NumberHeadEvent, \
+    TransparentDataReady, TransparentDataFinished
+from .exceptions import NexCommandException
 
-from .events import AbstractMsgEvent, CommandSucceeded, CurrentPageIDHeadEvent, StringHeadEvent, NumberHeadEvent
 
+def _settle_future(future: asyncio.Future, exception, result):
+    if not future.done():
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
 
-class CommandBase(QObject):
-    successful = pyqtSignal()
-    failed = pyqtSignal()
 
-    DATA_EVENT_CLASSES = None
-    " To be reimplemented in subclasses, define which event(s) are to be considered a data event "
+class Callbacks(object):
+    """ Qt-free replacement for a pyqtSignal: connected callables are called in order by emit().
+        See qt.QtCommandAdapter to relay command completion as real Qt signals.
+    """
+    __slots__ = ('_callbacks',)
+
+    def __init__(self):
+        self._callbacks = []
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def connect(self, callback: typing.Callable):
+        self._callbacks.append(callback)
+
+    def disconnect(self, callback: typing.Callable = None):
+        """ Disconnect the specified callback or, if None, all callbacks """
+        if callback is None:
+            self._callbacks.clear()
+        else:
+            self._callbacks.remove(callback)
+
+    def emit(self, *args):
+        # Iterate on a copy: callbacks may disconnect themselves
+        for callback in self._callbacks[:]:
+            callback(*args)
+
+
+class Completable(object):
+    """ Something completing asynchronously, either successfully or not. Completion is notified by the `successful`
+        and `failed` callbacks, which are called with the object as only argument, and to asyncio coroutines awaiting
+        it.
+    """
+    __slots__ = ('status', 'successful', 'failed', '_waiters', '__weakref__')
 
     class Status(Enum):
         CREATED = 0x00
@@ -21,11 +61,99 @@ class CommandBase(QObject):
         SUCCESSFUL = 0x02
         ERROR = 0x03
 
+    def __init__(self):
+        self.status = self.Status.CREATED
+        self.successful = Callbacks()
+        self.failed = Callbacks()
+        # asyncio (loop, future) tuples waiting for completion, see __await__
+        self._waiters = None
+
+    def __await__(self):
+        """ Wait for completion from an asyncio coroutine. Commands must have been enqueued.
+            :returns: result
+            :raises NexCommandException: if failed
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        if self.completed:
+            _settle_future(future, self._exception(), self.result)
+        else:
+            if self._waiters is None:
+                self._waiters = []
+            self._waiters.append((loop, future))
+        return (yield from future)
+
+    @property
+    def completed(self) -> bool:
+        return self.status == self.Status.SUCCESSFUL or self.status == self.Status.ERROR
+
+    @property
+    def result(self):
+        """ Outcome, to be reimplemented in subclasses returning data """
+        return None
+
+    def _exception(self):
+        if self.status == self.Status.ERROR:
+            return NexCommandException("{} failed".format(self))
+        return None
+
+    def _wake_waiters(self):
+        """ Settle asyncio futures in their own loop. Commands are usually completed by the poller thread, so always
+            hand over with call_soon_threadsafe(), which also wakes the loop up: call_soon() is not threadsafe.
+        """
+        exception = self._exception()
+        result = self.result
+        for loop, future in self._waiters:
+            if loop.is_closed():
+                # The coroutine is gone, do not make the completing thread fail
+                continue
+            loop.call_soon_threadsafe(_settle_future, future, exception, result)
+        self._waiters = None
+
+    def _connect_callbacks(self, on_successful, on_failed):
+        if on_successful:
+            self.successful.connect(on_successful)
+        if on_failed:
+            self.failed.connect(on_failed)
+
+    def finalize(self):
+        """ Called after internal status is updated but before notification callbacks are called.
+            To be reimplemented in subclasses to unpack payload and update 'result' if applicable.
+        """
+        pass
+
+    def _complete(self, successful: bool):
+        if successful:
+            self.status = self.Status.SUCCESSFUL
+            callbacks = self.successful
+        else:
+            self.status = self.Status.ERROR
+            callbacks = self.failed
+
+        self.finalize()
+        if self._waiters:
+            self._wake_waiters()
+        callbacks.emit(self)
+
+
+class CommandBase(Completable):
+    """ Base class for commands. Lightweight (no QObject), see Completable for completion notification.
+        Commands are stamped (time.monotonic()) when enqueued by NexDevice, sent and completed.
+    """
+    __slots__ = ('command', 'data_event', 'enqueued_at', 'sent_at', 'completed_at')
+
+    DATA_EVENT_CLASSES = None
+    " To be reimplemented in subclasses, define which event(s) are to be considered a data event "
+    EXCLUSIVE = False
+    " True if nothing else may be sent after the command until it is completed, see NexDevice._send_commands "
+
     def __init__(self, command, *params):
         super().__init__()
-        self.status = self.Status.CREATED
         self.command = self.format_command(command, *params)
         self.data_event = None
+        self.enqueued_at = None
+        self.sent_at = None
+        self.completed_at = None
 
     def __eq__(self, other) -> bool:
         return self.status == other.status and self.command == other.command and self.data_event == other.data_event
@@ -36,9 +164,10 @@ class CommandBase(QObject):
     def __repr__(self):
         return str(self)
 
-    @property
-    def completed(self) -> bool:
-        return self.status == self.Status.SUCCESSFUL or self.status == self.Status.ERROR
+    def _exception(self):
+        if self.status == self.Status.ERROR:
+            return NexCommandException("Command {} failed with data event {}".format(self.command, self.data_event))
+        return None
 
     @staticmethod
     def format_command(cmd: str, *params) -> bytes:
@@ -51,25 +180,28 @@ class CommandBase(QObject):
             data = bytes("{}\xFF\xFF\xFF".format(cmd), 'latin1', 'strict')
         return data
 
-    def _connect_signals(self, on_successful, on_failed):
-        if on_successful:
-            self.successful.connect(on_successful)
-        if on_failed:
-            self.failed.connect(on_failed)
+    @property
+    def frames(self) -> int:
+        """ Number of terminated commands written when the command is sent """
+        return 1
 
     def send(self, transport):
         transport.write(self.command)
-        self.status = self.status.SENT
+        self.mark_sent()
+
+    def mark_sent(self):
+        """ Update status once the command has been written, either by send() or as part of a batch """
+        self.status = self.Status.SENT
+        self.sent_at = time.monotonic()
 
     def reset(self):
         self.status = self.Status.CREATED
         self.data_event = None
+        self.enqueued_at = self.sent_at = self.completed_at = None
 
-    def finalize(self):
-        """ Called by event() after internal status is updated but before notification signals are called.
-            To be reimplemented in subclasses to unpack payload and update 'result' if applicable.
-        """
-        pass
+    def _complete(self, successful: bool):
+        self.completed_at = time.monotonic()
+        super()._complete(successful)
 
     def event(self, event: AbstractMsgEvent) -> bool:
         """ Handle an event
@@ -80,52 +212,193 @@ class CommandBase(QObject):
             self.data_event = event
             return False
 
-        if isinstance(event, CommandSucceeded):
-            # TODO: what if we have a data event class and we receive this before data event?
-            self.status = self.Status.SUCCESSFUL
-            signal = self.successful
-        else:
-            self.status = self.Status.ERROR
-            signal = self.failed
-
-        self.finalize()
-        signal.emit()
+        # TODO: what if we have a data event class and we receive this before data event?
+        self._complete(isinstance(event, CommandSucceeded))
         return True
 
 
+class CommandGroup(Completable):
+    """ Group of commands, completed when all of them are: successfully if all of them are successful.
+        Result is the list of the commands results.
+    """
+    __slots__ = ('commands', '_remaining', '_all_successful')
+
+    def __init__(self, commands: typing.Iterable[CommandBase], on_successful=None, on_failed=None):
+        super().__init__()
+        self.commands = list(commands)
+        self._remaining = len(self.commands)
+        self._all_successful = True
+        self._connect_callbacks(on_successful, on_failed)
+        for command in self.commands:
+            command.successful.connect(self._on_command_completed)
+            command.failed.connect(self._on_command_completed)
+        if not self.commands:
+            self._complete(True)
+
+    def __str__(self):
+        return "Command group {0.commands} - {0.status}".format(self)
+
+    def __repr__(self):
+        return str(self)
+
+    @property
+    def result(self):
+        return [command.result for command in self.commands]
+
+    def _on_command_completed(self, command: CommandBase):
+        command.successful.disconnect(self._on_command_completed)
+        command.failed.disconnect(self._on_command_completed)
+        if command.status == self.Status.ERROR:
+            self._all_successful = False
+        self._remaining -= 1
+        if not self._remaining:
+            self._complete(self._all_successful)
+
+
 class Command(CommandBase):
-    pass
+    __slots__ = ()
+
+
+class CommandBatch(CommandBase):
+    """ Several preformatted commands written at once, see draw.DisplayList. Completed when all of them have been
+        answered, successfully if all of them were: the device must answer every command (bkcmd=3, see
+        NexDevice.init()).
+    """
+    __slots__ = ('size', '_responses', '_all_successful')
+
+    def __init__(self, data: bytes, size: int, on_successful=None, on_failed=None):
+        """
+        :param data: The commands, each one with its terminator
+        :param size: The number of commands
+        """
+        super().__init__("")
+        self.command = bytes(data)
+        self.size = size
+        self._responses = 0
+        self._all_successful = True
+        self._connect_callbacks(on_successful, on_failed)
+
+    def __str__(self):
+        return "Command batch of {0.size} - {0.status}".format(self)
+
+    @property
+    def frames(self) -> int:
+        return self.size
+
+    def reset(self):
+        super().reset()
+        self._responses = 0
+        self._all_successful = True
+
+    def event(self, event: AbstractMsgEvent) -> bool:
+        self._responses += 1
+        if not isinstance(event, CommandSucceeded):
+            self._all_successful = False
+        if self._responses < self.size:
+            return False
+        self._complete(self._all_successful)
+        return True
 
 
 class SetPropertyCommand(CommandBase):
+    __slots__ = ('oid', 'property_name', 'new_value')
+
     def __init__(self, oid, name, value, on_successful=None, on_failed=None):
         if isinstance(value, bool):
             value = 1 if value else 0
 
         super().__init__("%s.%s=%s" % (oid, name, value))
+        self.oid = oid
         self.property_name = name
         self.new_value = value
-        self._connect_signals(on_successful, on_failed)
+        self._connect_callbacks(on_successful, on_failed)
+
+    def update_value(self, value):
+        """ Replace the value to be set. Only allowed before the command is sent. """
+        if self.status != self.Status.CREATED:
+            raise NexCommandException("Cannot change the value of a command already sent")
+        if isinstance(value, bool):
+            value = 1 if value else 0
+
+        self.command = self.format_command("%s.%s=%s" % (self.oid, self.property_name, value))
+        self.new_value = value
 
 
 class GetPropertyCommand(CommandBase):
+    __slots__ = ('property_name', 'decoder')
     DATA_EVENT_CLASSES = (StringHeadEvent, NumberHeadEvent)
 
-    def __init__(self, oid, name, on_successful=None, on_failed=None):
+    def __init__(self, oid, name, on_successful=None, on_failed=None, decoder=None):
+        """
+        :param decoder: Callable converting the data event to the property value, e.g. a signed number. By default
+            the value as sent by the device.
+        """
         super().__init__("get %s.%s" % (oid, name))
         self.property_name = name
-        self._connect_signals(on_successful, on_failed)
+        self.decoder = decoder  # type: typing.Union[typing.Callable[[AbstractMsgEvent], typing.Any], None]
+        self._connect_callbacks(on_successful, on_failed)
+
+    @property
+    def result(self):
+        """ The property value, see decoder """
+        if self.data_event is None:
+            return None
+        return self.decoder(self.data_event) if self.decoder is not None else self.data_event.value
 
 
 class SendmeCommand(CommandBase):
+    __slots__ = ()
     DATA_EVENT_CLASSES = (CurrentPageIDHeadEvent,)
 
     def __init__(self, on_successful=None, on_failed=None):
         super().__init__("sendme")
-        self._connect_signals(on_successful, on_failed)
+        self._connect_callbacks(on_successful, on_failed)
+
+    @property
+    def result(self):
+        """ The current page ID """
+        return self.data_event.pid if self.data_event is not None else None
 
 
 class PageCommand(CommandBase):
+    __slots__ = ()
+
     def __init__(self, page_number: int, on_successful=None, on_failed=None):
         super().__init__("page", page_number)
-        self._connect_signals(on_successful, on_failed)
+        self._connect_callbacks(on_successful, on_failed)
+
+
+class AddtCommand(CommandBase):
+    """ Bulk append of samples to a waveform channel. The addt instruction is sent first, the samples only once the
+        device is ready to receive them (TransparentDataReady, see NexDevice.poll). Completed by
+        TransparentDataFinished.
+        Exclusive: anything written before the transfer is finished would be taken as samples.
+    """
+    __slots__ = ('cid', 'channel', 'data')
+    EXCLUSIVE = True
+    MAX_SIZE = 1024
+    " Maximum number of samples of a single transfer, the size of the device input buffer "
+
+    def __init__(self, cid: int, channel: int, data: bytes, on_successful=None, on_failed=None):
+        """
+        :param cid: Waveform component ID
+        :param channel: Waveform channel
+        :param data: Samples, 1 byte each
+        """
+        if not 0 < len(data) <= self.MAX_SIZE:
+            raise NexCommandException("addt transfers 1 to {} samples, not {}".format(self.MAX_SIZE, len(data)))
+        super().__init__("addt", cid, channel, len(data))
+        self.cid = cid
+        self.channel = channel
+        self.data = bytes(data)
+        self._connect_callbacks(on_successful, on_failed)
+
+    def __str__(self):
+        return "Command addt {0.cid},{0.channel},{1} - {0.status}".format(self, len(self.data))
+
+    def event(self, event: AbstractMsgEvent) -> bool:
+        if isinstance(event, TransparentDataReady):
+            self.data_event = event
+            return False
+        self._complete(isinstance(event, TransparentDataFinished))
+        return True
@@ -82,7 +82,8 @@ class Format(Enum):
 
 
 class Baudrate:
-    SUPPORTED = {2400, 4800, 9600, 19200, 38400, 57600, 115200}
+    SUPPORTED = {2400, 4800, 9600, 19200, 38400, 57600, 115200, 230400, 250000, 256000, 512000, 921600}
+    " Rates above 115200 are not available on all models, see NexDevice.negotiate_baudrate() "
 
     @classmethod
     def _assert_supported(cls, value):
@@ -3,17 +3,25 @@
 
 import collections
 import logging
+import os
+import selectors
 import threading
+import time
 import typing
 
-from .constants import Return
-from .commands import CommandBase, Command, SendmeCommand
-from .events import MsgEvent, TouchEvent, Event
-from .exceptions import NexComponentNameException, NexComponentIdException
+from .constants import Baudrate, Return
+from .commands import CommandBase, CommandGroup, Command, SendmeCommand, SetPropertyCommand
+from .events import CommandSucceeded, MsgEvent, TouchEvent, TransparentDataReady, Event, EventSleepMode, \
+    EventWakeUpMode, EventUpgraded
+from .exceptions import NexBaudrateException, NexComponentNameException, NexComponentIdException, \
+    NexMessageException
+from .hardware import AbstractSerialNex
+from .scheduler import RefreshScheduler  # noqa: F401
+from .stats import DeviceStats
 from .widgets import WidgetFactory, NexPage
 from . import draw
 
-from PyQt5.QtCore import QObject, QReadWriteLock, pyqtSignal, pyqtSlot, QRunnable, QThread
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot, QRunnable, QThread
 
 __all__ = ['NexDevice']
 
@@ -22,9 +30,50 @@ class NexDevice(QObject):
     page_changed = pyqtSignal(int)
     """ Emitted whenever a page change event occurs. Parameter is page ID. """
 
-    def __init__(self, transport, parent=None):
+    command_enqueued = pyqtSignal()
+    """ Emitted whenever a new command is enqueued, from the enqueueing thread """
+
+    BAUDRATE_SWITCH_DELAY = 0.05
+    " Time [s] to wait after a baud rate change before talking to the device "
+    PROBE_TIMEOUT = 0.5
+    " Time [s] to wait for the response to the command confirming a baud rate "
+    DEVICE_STATE_EVENTS = (EventSleepMode, EventWakeUpMode, EventUpgraded)
+    " Events sent by the device on its own, which must not be taken as responses "
+
+    def __init__(self, transport, parent=None, max_in_flight: int = 1,
+                 max_in_flight_bytes: int = AbstractSerialNex.INCOMING_BUFFER_SIZE,
+                 max_write_size: int = AbstractSerialNex.INCOMING_BUFFER_SIZE):
+        """
+        :param transport: An AbstractSerialNex
+        :param max_in_flight: Maximum number of commands sent and waiting for a response. Values greater than 1
+            pipeline commands, responses are matched to commands in FIFO order.
+        :param max_in_flight_bytes: Maximum size of the commands sent and waiting for a response, must not overflow
+            the device input buffer.
+        :param max_write_size: Commands sent in the same poll cycle are coalesced into writes of at most this size
+        """
         super().__init__(parent)
         self.transport = transport
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.max_write_size = max_write_size
+        self.refresh_scheduler = None  # type: RefreshScheduler
+        """ If set, decides which properties of the current page are refreshed, otherwise all of them are refreshed
+            whenever the commands queue is empty
+        """
+        self.refresh_on_touch = False
+        """ If True widgets are not refreshed continuously: a widget REFRESH_VARIABLES are read only when a touch
+            event for it is received (the "Send Component ID" option must be set in the HMI)
+        """
+        self.trailing_refresh_delay = None  # type: typing.Union[float, None]
+        """ With refresh_on_touch, read the widget again this many seconds after it has been released """
+        self.refresh_interval = None  # type: typing.Union[float, None]
+        """ Without refresh_scheduler, minimum time [s] between the starts of two refreshes of the whole current
+            page. None to refresh it again as soon as the commands queue is empty, or at the rate passed to poll(),
+            e.g. by NexEventPoller.
+        """
+        self._page_refreshed_at = None  # type: typing.Union[float, None]
+        # (monotonic deadline, widget) of pending trailing refreshes, in deadline order
+        self._trailing_refreshes = collections.deque()
         self._logger = logging.getLogger("pynextion.NexDevice")
         self._initialized = False
         # Reference to the current NexPage
@@ -37,10 +86,14 @@ class NexDevice(QObject):
         self._sendme_command = SendmeCommand()
         self._sendme_command.successful.connect(self._on_sendme_successful)
         self._sendme_command.failed.connect(self._on_sendme_failed)
-        # FIFO of outstanding commands (to be sent, sent, waiting response)
+        # FIFO of outstanding commands (to be sent, sent, waiting response). Commands are enqueued from any thread,
+        # the lock must be held to iterate on it or to move commands around.
         self._commands = collections.deque()
+        # Reentrant: completion callbacks run with the lock held and may enqueue new commands
+        self._commands_lock = threading.RLock()
         # Incoming async events
         self._events = collections.deque()
+        self._stats = DeviceStats()
 
     # Accessors ---------------------------------------------------------------
     def get_page(self, name_or_id) -> NexPage:
@@ -65,16 +118,32 @@ class NexDevice(QObject):
         """ Get the visible page from device. Asynchronous. When completed the current_page property will be updated
             and page_changed signal emitted if necessary.
         """
-        if self._sendme_command in self._commands:
-            # It is being handled, do nothing.
-            pass
-        else:
-            # Do NOT reset() it, it is a job for the command completion handlers
-            if not self._sendme_command.completed:
-                self._commands.appendleft(self._sendme_command)
+        with self._commands_lock:
+            if any(command is self._sendme_command for command in self._commands):
+                # It is being handled, do nothing.
+                pass
+            else:
+                # Do NOT reset() it, it is a job for the command completion handlers
+                if not self._sendme_command.completed:
+                    self._on_enqueue_command(self._sendme_command)
 
     __getitem__ = get_page
 
+    def stats(self, reset: bool = False) -> dict:
+        """ Snapshot of the statistics collected since creation or the last reset:
+
+            - "commands": for each command type the number of successful/failed commands and histograms (in seconds)
+              of the time spent in the queue ("queued"), waiting for the response ("response") and overall ("total")
+            - "queue_depth" (current), "max_queue_depth" and "queue_depths" (histogram, sampled on enqueue)
+            - "written"/"read": bytes and frames, in total and per second
+
+            :param reset: Start collecting from scratch after the snapshot, e.g. to get per-interval rates
+        """
+        snapshot = self._stats.snapshot()
+        if reset:
+            self._stats.reset()
+        return snapshot
+
     @property
     def initialized(self) -> bool:
         return self._initialized
@@ -82,15 +151,29 @@ class NexDevice(QObject):
     # ~Accessors --------------------------------------------------------------
 
     # Drawing primitives ------------------------------------------------------
-    def cls(self, colour=None):
-        draw.cls(self.transport, colour)
+    def cls(self, colour=None) -> CommandGroup:
+        display_list = draw.DisplayList()
+        display_list.cls(colour)
+        return self.draw(display_list)
+
+    def draw(self, display_list: draw.DisplayList) -> CommandGroup:
+        """ Enqueue the primitives of a display list in as few writes as possible. Completed when the device has
+            answered all of them.
+        """
+        commands = display_list.commands()
+        for command in commands:
+            self._on_enqueue_command(command)
+        return CommandGroup(commands)
 
     # ~Drawing primitives -----------------------------------------------------
 
     # Methods -----------------------------------------------------------------
-    def init(self):
+    def init(self, baudrates: typing.Union[int, typing.Iterable[int]] = None, persistent: bool = False):
         """ Set the device to always send responses and select page 0. To be called in single-threaded environment
             WITHOUT any poller running
+            :param baudrates: If set, switch the link to the first of these baud rates the device confirms,
+                see negotiate_baudrate()
+            :param persistent: Make the new baud rate the device power on default
         """
         self._logger.info("Initializing Nextion device")
         # Flush incoming data
@@ -108,6 +191,9 @@ class NexDevice(QObject):
         while self._commands:
             self.poll()
 
+        if baudrates is not None:
+            self.negotiate_baudrate(baudrates, persistent)
+
         for page_id, page in self._pages_by_id.items():
             self.select_page(page_id)
             while self._commands:
@@ -124,6 +210,56 @@ class NexDevice(QObject):
         self._initialized = True
         self._logger.info("Nextion device initialized")
 
+    def negotiate_baudrate(self, baudrates: typing.Union[int, typing.Iterable[int]], persistent: bool = False) -> int:
+        """ Try the baud rates in the given order: each one is set on device ("baud=" or, if persistent, "bauds=")
+            and on the transport, then confirmed with a probe command. If the probe fails both sides are brought
+            back to the previous rate and the next one is tried.
+            To be called WITHOUT any poller running, with the device initialized to always send responses.
+            :returns: The baud rate in use
+            :raises NexBaudrateException: If the device cannot be reached any more
+        """
+        if isinstance(baudrates, int):
+            baudrates = (baudrates,)
+        command = "bauds" if persistent else "baud"
+        current = self.transport.baudrate
+        for baudrate in baudrates:
+            Baudrate.at(baudrate)
+            if baudrate == current:
+                return current
+
+            self._logger.info("Switching baud rate from %d to %d", current, baudrate)
+            if self._switch_baudrate(command, baudrate):
+                return baudrate
+
+            self._logger.warning("Device does not answer at %d baud, falling back to %d", baudrate, current)
+            if not self._switch_baudrate(command, current):
+                raise NexBaudrateException("Device does not answer at %d baud any more" % current)
+
+        return current
+
+    def _switch_baudrate(self, command: str, baudrate: int) -> bool:
+        # The response, if any, may come at either rate: do not wait for it
+        self.transport.write(CommandBase.format_command("%s=%d" % (command, baudrate)))
+        self.transport.set_baudrate(baudrate)
+        # Give the device time to reconfigure its UART
+        time.sleep(self.BAUDRATE_SWITCH_DELAY)
+        self.transport.read_all()
+        return self._execute(SendmeCommand(), self.PROBE_TIMEOUT)
+
+    def _execute(self, command: CommandBase, timeout: float) -> bool:
+        """ Enqueue a command and poll until it is completed or timeout [s] expires. To be called WITHOUT any poller
+            running. Return True if the command was successful.
+        """
+        self._on_enqueue_command(command)
+        deadline = time.monotonic() + timeout
+        while not command.completed:
+            if time.monotonic() > deadline:
+                with self._commands_lock:
+                    self._commands.remove(command)
+                return False
+            self.poll()
+        return command.status == command.Status.SUCCESSFUL
+
     @pyqtSlot()
     def reset(self):
         self._logger.debug("Sending RESET command to device")
@@ -144,6 +280,7 @@ class NexDevice(QObject):
         if pid is not None:
             self._pages_by_id[pid] = page
         self._pages_by_name[name] = page
+        page.device = self
         self._logger.debug("Hooked new page %s", page)
         page.enqueue_command.connect(self._on_enqueue_command)
         return page
@@ -167,35 +304,51 @@ class NexDevice(QObject):
         #   response updates the current page
         pass
 
+    def update_queued_value(self, command: SetPropertyCommand, value) -> bool:
+        """ Replace the value of a queued property change if it has not been sent yet. Threadsafe: the command
+            cannot be sent while its value is being replaced.
+            Return False if it has already been sent, a new command is needed.
+        """
+        with self._commands_lock:
+            if command.status != command.Status.CREATED:
+                return False
+            command.update_value(value)
+            return True
+
     @pyqtSlot(CommandBase)
     def _on_enqueue_command(self, command):
-        self._commands.appendleft(command)
+        command.enqueued_at = time.monotonic()
+        with self._commands_lock:
+            self._commands.appendleft(command)
+            self._stats.command_enqueued(len(self._commands))
+        self.command_enqueued.emit()
 
-    @pyqtSlot()
-    def _on_sendme_successful(self):
+    def _on_sendme_successful(self, command: SendmeCommand):
         # data_event is a CurrentPageIDHeadEvent
         pid = self._sendme_command.data_event.pid
         current_page = self.pages_by_id[pid]
 
-        if self._current_page is None:
-            self.page_changed.emit(current_page.pid)
-        elif self._current_page.pid != current_page.pid:
+        changed = self._current_page is None or self._current_page.pid != current_page.pid
+        if changed:
             self.page_changed.emit(current_page.pid)
         self._current_page = current_page
+        if changed:
+            # Changed on the device itself, e.g. by a button: let the widgets restore their contents
+            current_page.page_shown()
         # Will need this because it will be reenqueued only if status is CREATED
         self._sendme_command.reset()
 
-    @pyqtSlot()
-    def _on_sendme_failed(self):
+    def _on_sendme_failed(self, command: SendmeCommand):
         self._current_page = None
         self._logger.error("SENDME command failed: %s", self._sendme_command.data_event)
         # Will need this because it will be reenqueued only if status is CREATED
         self._sendme_command.reset()
 
     @pyqtSlot()
-    def poll(self) -> bool:
+    def poll(self, refresh_interval: float = None) -> bool:
         """ Poll the incoming events and dispatch them. Manage the commands queue. Return True if commands queue
             is empty.
+            :param refresh_interval: Used in place of refresh_interval if that is None, see NexEventPoller
         """
         events = []
         # First we read any events that may have come in since the last scan.
@@ -203,7 +356,14 @@ class NexDevice(QObject):
         while True:
             data = self.transport.read_next()
             if data:
-                event = MsgEvent.parse(data)
+                self._stats.read(len(data))
+                # Already split and checked by the transport FrameDecoder
+                try:
+                    event = MsgEvent.decode(data)
+                except (NexMessageException, NotImplementedError) as e:
+                    # Do not let line noise or an unsupported event stop the poller
+                    self._logger.warning("Dropping undecodable frame %r: %s", bytes(data), e)
+                    continue
                 events.append(event)
                 # self._logger.debug("Incoming event %s", event)
             else:
@@ -223,39 +383,27 @@ class NexDevice(QObject):
                         widget.pressed.emit()
                     else:
                         widget.released.emit()
+                    if self.refresh_on_touch:
+                        self._refresh_touched(widget, event.press_event is Event.Touch.Release)
+            elif isinstance(event, self.DEVICE_STATE_EVENTS):
+                # Not an answer to any command
+                self._logger.info("Received device event %s", event)
             else:
                 # This is a response to a previous command.
-                # Look for the first command in SENT status and feed it the event
-                # Since new commands are appended to the left we expect the right one to be the one missing a response
-                while self._commands:
-                    command = self._commands[-1]
-                    if command.status == CommandBase.Status.CREATED:
-                        # The rightmost (oldest) one has not been sent. There's something wrong.
-                        # Just rotate (and possibly starve this command) and hope for good.
-                        self._logger.warning("Event %s received but oldest command is %s", event, command)
-                        # Will be sent later
-                        self._commands.rotate()
-                    elif command.status == CommandBase.Status.SENT:
-                        # Feed the event to the command and remove it from the queue if completed.
-                        # If it has some handlers attached the signals emitted will have a copy so it SHOULD
-                        # not be garbage collected
-                        if command.event(event):
-                            self._logger.info("Event %s -> command removed %s", event, command)
-                            self._commands.pop()
-                        break
-                    else:
-                        self._logger.error("Event %s received but oldest command is %s", event, command)
-                        # Should NEVER get here, see above
-                        self._commands.rotate()
-
-        if self._commands:
-            # self._logger.debug("Commands queue %s", self._commands)
-            # We send only one command at a time since the Nextion is single-core
-            # and will process one command at a time anyway
-            command = self._commands[-1]
-            if command.status == CommandBase.Status.CREATED:
-                self._logger.debug("Sending command %s", command)
-                command.send(self.transport)
+                with self._commands_lock:
+                    self._dispatch_response(event)
+
+        if self._trailing_refreshes:
+            now = time.monotonic()
+            while self._trailing_refreshes and self._trailing_refreshes[0][0] <= now:
+                widget = self._trailing_refreshes.popleft()[1]
+                if self._widget_shown(widget):
+                    widget.refresh()
+
+        with self._commands_lock:
+            if self._commands:
+                # self._logger.debug("Commands queue %s", self._commands)
+                self._send_commands()
 
         if self._initialized and not self._commands:
             # Device must be initialized before refreshing widgets
@@ -264,44 +412,237 @@ class NexDevice(QObject):
             self.refresh()
             # Starting from some firmware version (Nextion editor 0.58) we can ask for properties
             # only for currently visible page
-            if self.current_page:
-                self.current_page.refresh()
+            if self.current_page and not self.refresh_on_touch:
+                if self.refresh_scheduler is None:
+                    self._refresh_current_page(refresh_interval)
+                else:
+                    self.refresh_scheduler.refresh(self.current_page)
 
         return not self._commands
 
+    def _refresh_current_page(self, refresh_interval: float = None):
+        """ Refresh the whole current page, at most once every refresh_interval """
+        if self.refresh_interval is not None:
+            refresh_interval = self.refresh_interval
+        if refresh_interval is not None:
+            now = time.monotonic()
+            if self._page_refreshed_at is not None and now - self._page_refreshed_at < refresh_interval:
+                return
+            self._page_refreshed_at = now
+        self.current_page.refresh()
+
+    def _dispatch_response(self, event):
+        """ Feed a response to the command waiting for it. To be called with _commands_lock held. """
+        # Look for the first command in SENT status and feed it the event
+        # Since new commands are appended to the left we expect the right one to be the one missing a response
+        while self._commands:
+            command = self._commands[-1]
+            if command.status == CommandBase.Status.CREATED:
+                # The rightmost (oldest) one has not been sent. There's something wrong.
+                # Just rotate (and possibly starve this command) and hope for good.
+                self._logger.warning("Event %s received but oldest command is %s", event, command)
+                # Will be sent later
+                self._commands.rotate()
+            elif command.status == CommandBase.Status.SENT:
+                # Feed the event to the command and remove it from the queue if completed.
+                # Completion callbacks are called with the command as argument so it SHOULD
+                # not be garbage collected
+                # Completion callbacks may reset() the command and its timestamps
+                enqueued_at, sent_at = command.enqueued_at, command.sent_at
+                if command.event(event):
+                    self._logger.info("Event %s -> command removed %s", event, command)
+                    self._commands.pop()
+                    self._stats.command_completed(
+                        command.__class__.__name__, isinstance(event, CommandSucceeded), enqueued_at,
+                        sent_at, time.monotonic(), len(self._commands))
+                elif isinstance(event, TransparentDataReady):
+                    self._write_transparent(command)
+                break
+            else:
+                self._logger.error("Event %s received but oldest command is %s", event, command)
+                # Should NEVER get here, see above
+                self._commands.rotate()
+
+    def next_refresh_delay(self, refresh_interval: float = None) -> typing.Union[float, None]:
+        """ Time [s] before poll() needs to be called again to refresh widgets when the device is idle.
+            None if it does not need to be called until some data comes in or a command is enqueued.
+            :param refresh_interval: The one passed to poll()
+        """
+        if self.refresh_interval is not None:
+            refresh_interval = self.refresh_interval
+        delay = None
+        if self._trailing_refreshes:
+            delay = max(self._trailing_refreshes[0][0] - time.monotonic(), 0.0)
+
+        if self._initialized and self.current_page is not None and not self.refresh_on_touch:
+            if self.refresh_scheduler is not None:
+                scheduled = self.refresh_scheduler.next_refresh_delay(self.current_page)
+            elif refresh_interval is not None and self._page_refreshed_at is not None:
+                scheduled = max(self._page_refreshed_at + refresh_interval - time.monotonic(), 0.0)
+            else:
+                # The whole page is refreshed as soon as the queue is empty, if poll() left it empty there is
+                # nothing to refresh
+                scheduled = None
+            if scheduled is not None:
+                delay = scheduled if delay is None else min(delay, scheduled)
+
+        return delay
+
+    def _widget_shown(self, widget) -> bool:
+        """ True if the widget is on the current page and no page switch is in progress, i.e. it can be read """
+        page = self._current_page
+        return page is not None and widget.pid == page.pid and not page.page_switch_in_progress
+
+    def _refresh_touched(self, widget, released: bool):
+        # e.g. a button whose release handler selects another page
+        if not self._widget_shown(widget):
+            return
+        widget.refresh()
+        if released and self.trailing_refresh_delay is not None:
+            self._trailing_refreshes.append((time.monotonic() + self.trailing_refresh_delay, widget))
+
+    def _send_commands(self):
+        """ Send the oldest commands not sent yet, keeping at most max_in_flight commands (and max_in_flight_bytes)
+            waiting for a response. The Nextion is single-core and will process one command at a time anyway, but
+            queueing the next ones in its input buffer saves a round-trip per command.
+            Commands are coalesced into as few transport writes as max_write_size allows. Nothing is sent after an
+            EXCLUSIVE command until it is completed.
+        """
+        in_flight = 0
+        in_flight_bytes = 0
+        batch = []
+        batch_size = 0
+        # Oldest commands are on the right
+        for command in reversed(self._commands):
+            if command.status == CommandBase.Status.SENT:
+                if command.EXCLUSIVE:
+                    break
+                in_flight += 1
+                in_flight_bytes += len(command.command)
+            elif command.status == CommandBase.Status.CREATED:
+                size = len(command.command)
+                if in_flight >= self.max_in_flight or (in_flight and in_flight_bytes + size > self.max_in_flight_bytes):
+                    break
+                if batch and batch_size + size > self.max_write_size:
+                    self._write_batch(batch)
+                    batch = []
+                    batch_size = 0
+                batch.append(command)
+                batch_size += size
+                in_flight += 1
+                in_flight_bytes += size
+                if command.EXCLUSIVE:
+                    break
+
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: typing.List[CommandBase]):
+        if len(batch) == 1:
+            self._logger.debug("Sending command %s", batch[0])
+            batch[0].send(self.transport)
+            self._stats.written(len(batch[0].command), batch[0].frames)
+        else:
+            self._logger.debug("Sending %d commands %s", len(batch), batch)
+            data = b''.join([command.command for command in batch])
+            self.transport.write(data)
+            for command in batch:
+                command.mark_sent()
+            self._stats.written(len(data), sum(command.frames for command in batch))
+
+    def _write_transparent(self, command: CommandBase):
+        """ Send the data of a transparent transfer, e.g. AddtCommand, once the device is ready for it """
+        self._logger.debug("Sending %d bytes of transparent data for %s", len(command.data), command)
+        self.transport.write(command.data)
+        self._stats.written(len(command.data), 0)
+
     # ~Methods ----------------------------------------------------------------
 
 
 class NexEventPoller(QRunnable):
+    """ Run NexDevice.poll() in a worker thread.
+        The thread sleeps in select() on the transport file descriptor and on a wake-up pipe, so it reacts as soon as
+        data comes in, a command is enqueued or a refresh is due (see NexDevice.refresh_scheduler and
+        NexDevice.refresh_interval), and does not wake up at all while the device is idle.
+        Transports without a selectable fileno() fall back to polling every poll_interval_ms.
+    """
+
     def __init__(self, device: NexDevice, poll_interval_ms: int):
+        """
+        :param device: The device to poll
+        :param poll_interval_ms: Maximum wait while commands are waiting for a response (guards against lost
+            responses) or polling interval if the transport is not selectable. Without a refresh_scheduler it is
+            also the minimum interval between refreshes of the whole current page, unless NexDevice.refresh_interval
+            is set, otherwise the poller would refresh back to back, saturating link and CPU.
+        """
         super().__init__()
         self._device = device
         self._logger = logging.getLogger("pynextion.NexEventPoller")
         self._run_poll_loop = True
-        self._run_poll_loop_lock = QReadWriteLock()
-        self._thread_local = threading.local()
         self._poll_interval_ms = poll_interval_ms
+        # Passed to every poll(), the device is left untouched
+        self._refresh_interval = poll_interval_ms / 1000.0
+        self._wakeup_read_fd, self._wakeup_write_fd = os.pipe()
+        os.set_blocking(self._wakeup_read_fd, False)
+        os.set_blocking(self._wakeup_write_fd, False)
+        # Called in the thread enqueueing the command
+        self._device.command_enqueued.connect(self.wakeup, Qt.DirectConnection)
 
     def stop(self):
         self._logger.info("Stopping Nextion event poller loop")
+        self._run_poll_loop = False
+        self.wakeup()
+
+    def wakeup(self):
+        """ Interrupt the wait. Threadsafe. """
         try:
-            self._run_poll_loop_lock.lockForWrite()
-            self._run_poll_loop = False
-        finally:
-            self._run_poll_loop_lock.unlock()
+            os.write(self._wakeup_write_fd, b'\x00')
+        except (BlockingIOError, OSError):
+            # Pipe full (a wake-up is pending anyway) or already closed
+            pass
 
-    def run(self):
-        self._logger.info("Starting Nextion event poller with a %d [ms] interval", self._poll_interval_ms)
-        while True:
-            try:
-                self._run_poll_loop_lock.lockForRead()
-                self._thread_local.run = self._run_poll_loop
-            finally:
-                self._run_poll_loop_lock.unlock()
-
-            if not self._thread_local.run:
-                self._logger.info("Exiting Nextion event poller loop")
-                break
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_read_fd, 512):
+                pass
+        except BlockingIOError:
+            pass
 
-            self._device.poll()
+    def _transport_fileno(self):
+        try:
+            return self._device.transport.fileno()
+        except (AttributeError, OSError):
+            return None
+
+    def run(self):
+        fileno = self._transport_fileno()
+        try:
+            if fileno is None:
+                self._logger.info("Starting Nextion event poller with a %d [ms] interval", self._poll_interval_ms)
+                self._run_interval_loop()
+            else:
+                self._logger.info("Starting Nextion event poller on fd %d", fileno)
+                self._run_select_loop(fileno)
+        finally:
+            self._device.command_enqueued.disconnect(self.wakeup)
+            os.close(self._wakeup_read_fd)
+            os.close(self._wakeup_write_fd)
+        self._logger.info("Exiting Nextion event poller loop")
+
+    def _run_interval_loop(self):
+        while self._run_poll_loop:
+            self._device.poll(self._refresh_interval)
             QThread.msleep(self._poll_interval_ms)
+
+    def _run_select_loop(self, fileno: int):
+        response_timeout = self._poll_interval_ms / 1000.0
+        with selectors.DefaultSelector() as selector:
+            selector.register(fileno, selectors.EVENT_READ)
+            selector.register(self._wakeup_read_fd, selectors.EVENT_READ)
+            while self._run_poll_loop:
+                idle = self._device.poll(self._refresh_interval)
+                # When idle wait for incoming data, new commands or the next scheduled refresh
+                timeout = self._device.next_refresh_delay(self._refresh_interval) if idle else response_timeout
+                for key, _ in selector.select(timeout):
+                    if key.fd == self._wakeup_read_fd:
+                        self._drain_wakeup()
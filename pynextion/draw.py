@@ -1,3 +1,5 @@
+import typing
+
 from .constants import (
     Background,
     Alignment,
@@ -8,6 +10,8 @@ from .color import (
     BACKCOLOR_DEFAULT,
     FORECOLOR_DEFAULT
 )
+from .commands import CommandBase, CommandBatch
+from .hardware import AbstractSerialNex
 from .resources import FONT_DEFAULT
 from .int_tools import assert_integers_in_range
 
@@ -135,3 +139,91 @@ def picture(nexSerial, x, y, pic, w=None, h=None, x0=None, y0=None):
         return nexSerial.send("picq %s,%s,%s,%s,%s" % (x, y, w, h, picid))
     else:
         return nexSerial.send("xpic %s,%s,%s,%s,%s,%s,%s" % (x, y, w, h, x0, y0, picid))  # xpic or picq?
+
+
+class DisplayList(object):
+    """ Collects drawing primitives to send them together. It can be passed to all the functions of this module in
+        place of nexSerial, or the same functions can be called as methods:
+
+        >>> display_list = DisplayList()
+        >>> display_list.cls(NamedColor.BLACK)
+        >>> for x in range(0, 480, 40):
+        ...     display_list.line(x, 0, x, 319, NamedColor.GRAY)
+        >>> device.draw(display_list)
+
+        Each primitive is encoded once, when added. The list is sent as few CommandBatch as possible, each one
+        small enough (max_size) for the device input buffer, and can be sent again (e.g. static axes and grids on every
+        refresh) without any further encoding.
+    """
+
+    def __init__(self, max_size: int = AbstractSerialNex.INCOMING_BUFFER_SIZE):
+        """
+        :param max_size: Maximum size of a batch [bytes]
+        """
+        self.max_size = max_size
+        self._commands = []  # type: typing.List[bytes]
+        # (data, number of commands) of each batch, built on demand
+        self._batches = None
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def send(self, cmd: str):
+        """ Append a command (nexSerial interface) """
+        self.append(CommandBase.format_command(cmd))
+    write = send
+
+    def append(self, data: bytes):
+        """ Append an encoded command, terminator included """
+        self._commands.append(data)
+        self._batches = None
+
+    def extend(self, other: 'DisplayList'):
+        self._commands.extend(other._commands)
+        self._batches = None
+
+    def clear(self):
+        self._commands.clear()
+        self._batches = None
+
+    def batches(self) -> typing.List[typing.Tuple[bytes, int]]:
+        """ The commands joined in (data, number of commands) chunks of at most max_size bytes """
+        if self._batches is None:
+            self._batches = []
+            chunk = []
+            size = 0
+            for command in self._commands:
+                if chunk and size + len(command) > self.max_size:
+                    self._batches.append((b''.join(chunk), len(chunk)))
+                    chunk = []
+                    size = 0
+                chunk.append(command)
+                size += len(command)
+            if chunk:
+                self._batches.append((b''.join(chunk), len(chunk)))
+        return self._batches
+
+    def commands(self) -> typing.List[CommandBatch]:
+        """ New commands sending the display list, to be enqueued (see NexDevice.draw()) """
+        return [CommandBatch(data, size) for data, size in self.batches()]
+
+    def encode(self) -> bytes:
+        return b''.join(data for data, _ in self.batches())
+
+    def cls(self, colour=None):
+        cls(self, colour)
+
+    def rectangle(self, x1, y1, x2, y2, colour=None, mode=Background.NOBACKCOLOUR):
+        rectangle(self, x1, y1, x2, y2, colour, mode)
+
+    def circle(self, x, y, r, colour=None, mode=Background.NOBACKCOLOUR):
+        circle(self, x, y, r, colour, mode)
+
+    def xstr(self, s, x, y, w, h, *args, **kwargs):
+        xstr(self, s, x, y, w, h, *args, **kwargs)
+
+    def line(self, x1, y1, x2, y2, colour=None):
+        line(self, x1, y1, x2, y2, colour)
+
+    def picture(self, x, y, pic, w=None, h=None, x0=None, y0=None):
+        picture(self, x, y, pic, w, h, x0, y0)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import ctypes
+import struct
 
 from enum import Enum
 
@@ -34,9 +34,27 @@ def ensure_has_end(msg):
 
 
 class AbstractMsgEvent:
+    """ Events are small slotted value objects: no per-instance __dict__, compared and hashed by their fields """
+    __slots__ = ()
+    _FIELDS = ()
     EXPECTED_LENGTH = None
     FIRST_BYTE = None
 
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._FIELDS)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self._values()))
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, ", ".join(repr(value) for value in self._values()))
+
     @classmethod
     def ensure_has_expected_length(cls, msg):
         expected_length = cls.EXPECTED_LENGTH
@@ -46,11 +64,25 @@ class AbstractMsgEvent:
 
     @classmethod
     def ensure_has_expected_first_byte(cls, msg, first_byte):
-        expected_first_byte = cls.FIRST_BYTE
+        expected_first_byte = cls.FIRST_BYTE.value
         if first_byte != expected_first_byte:
             raise NexMessageFirstByteException(
                 "Event message %r must have %d as first byte not %d" % (msg, expected_first_byte, first_byte))
 
+    @classmethod
+    def parse(cls, msg):
+        """ Check and decode a message """
+        msg = _as_buffer(msg)
+        ensure_has_end(msg)
+        cls.ensure_has_expected_length(msg)
+        cls.ensure_has_expected_first_byte(msg, msg[0])
+        return cls.decode(msg)
+
+    @classmethod
+    def decode(cls, msg):
+        """ Decode a message known to be well formed, see MsgEvent.decode() """
+        raise NotImplementedError()
+
     def isempty(self):
         return False
 
@@ -58,7 +90,17 @@ class AbstractMsgEvent:
         return True
 
 
+# Events are decoded straight from the frame with precompiled unpackers
+_TOUCH = struct.Struct("<xBBB")
+_POSITION = struct.Struct(">xHHB")
+_UINT32 = struct.Struct("<xI")
+_INT32 = struct.Struct("<xi")
+# Event.Touch indexed by value, avoids the Enum lookup
+_TOUCH_STATES = (Event.Touch.Release, Event.Touch.Press)
+
+
 class TouchEvent(AbstractMsgEvent):
+    __slots__ = _FIELDS = ('code', 'pid', 'cid', 'press_event')
     EXPECTED_LENGTH = 7
     FIRST_BYTE = Return.Code.EVENT_TOUCH_HEAD
 
@@ -74,19 +116,19 @@ class TouchEvent(AbstractMsgEvent):
             self
         )
 
+    @property
+    def tevts(self):
+        """ Same as press_event, named like in PositionHeadEvent """
+        return self.press_event
+
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        pid = int(msg[1])
-        cid = int(msg[2])
-        tevts = Event.Touch(msg[3])
-        return TouchEvent(code, pid, cid, tevts)
+    def decode(cls, msg):
+        pid, cid, state = _TOUCH.unpack_from(msg)
+        return cls(cls.FIRST_BYTE, pid, cid, _TOUCH_STATES[state])
 
 
 class CurrentPageIDHeadEvent(AbstractMsgEvent):
+    __slots__ = _FIELDS = ('code', 'pid')
     EXPECTED_LENGTH = 5
     FIRST_BYTE = Return.Code.CURRENT_PAGE_ID_HEAD
 
@@ -95,16 +137,12 @@ class CurrentPageIDHeadEvent(AbstractMsgEvent):
         self.pid = pid
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        pid = int(msg[1])
-        return CurrentPageIDHeadEvent(code, pid)
+    def decode(cls, msg):
+        return cls(cls.FIRST_BYTE, msg[1])
 
 
 class PositionHeadEvent(AbstractMsgEvent):
+    __slots__ = _FIELDS = ('code', 'x', 'y', 'tevts')
     EXPECTED_LENGTH = 9
     FIRST_BYTE = Return.Code.EVENT_POSITION_HEAD
 
@@ -115,40 +153,18 @@ class PositionHeadEvent(AbstractMsgEvent):
         self.tevts = tevts
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        x = (msg[1] << 8) + msg[2]
-        y = (msg[3] << 8) + msg[4]
-        tevts = Event.Touch(msg[5])
-        return PositionHeadEvent(code, x, y, tevts)
+    def decode(cls, msg):
+        x, y, state = _POSITION.unpack_from(msg)
+        return cls(cls.FIRST_BYTE, x, y, _TOUCH_STATES[state])
 
 
-class SleepPositionHeadEvent(AbstractMsgEvent):
-    EXPECTED_LENGTH = 9
+class SleepPositionHeadEvent(PositionHeadEvent):
+    __slots__ = ()
     FIRST_BYTE = Return.Code.EVENT_SLEEP_POSITION_HEAD
 
-    def __init__(self, code, x, y, tevts):
-        self.code = code
-        self.x = x
-        self.y = y
-        self.tevts = tevts
-
-    @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        x = (msg[1] << 8) + msg[2]
-        y = (msg[3] << 8) + msg[4]
-        tevts = Event.Touch(msg[5])
-        return SleepPositionHeadEvent(code, x, y, tevts)
-
 
 class StringHeadEvent(AbstractMsgEvent):
+    __slots__ = _FIELDS = ('code', 'value')
     EXPECTED_LENGTH = None
     FIRST_BYTE = Return.Code.STRING_HEAD
 
@@ -157,16 +173,12 @@ class StringHeadEvent(AbstractMsgEvent):
         self.value = value
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        value = bytearray(msg[1:-3]).decode("utf-8")
-        return StringHeadEvent(code, value)
+    def decode(cls, msg):
+        return cls(cls.FIRST_BYTE, str(msg[1:-3], "utf-8"))
 
 
 class NumberHeadEvent(AbstractMsgEvent):
+    __slots__ = _FIELDS = ('code', 'value', 'signed_value')
     EXPECTED_LENGTH = 8
     FIRST_BYTE = Return.Code.NUMBER_HEAD
 
@@ -176,48 +188,113 @@ class NumberHeadEvent(AbstractMsgEvent):
         self.signed_value = signed_value
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        value = msg[1] + (msg[2] << 8) + (msg[3] << 16) + (msg[4] << 24)
-        signed_value = ctypes.c_int32(value).value
-        return NumberHeadEvent(code, value, signed_value)
+    def decode(cls, msg):
+        return cls(cls.FIRST_BYTE, _UINT32.unpack_from(msg)[0], _INT32.unpack_from(msg)[0])
 
 
 class CommandSucceeded(AbstractMsgEvent):
+    """ Immutable, decoding always returns the COMMAND_SUCCEEDED instance """
+    __slots__ = ()
     EXPECTED_LENGTH = 4
     FIRST_BYTE = Return.Code.CMD_FINISHED
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        return CommandSucceeded()
+    def decode(cls, msg):
+        return COMMAND_SUCCEEDED
+
+
+class CommandFailed(AbstractMsgEvent):
+    """ Error code answered to a command. Immutable, decoding returns a shared instance per code """
+    __slots__ = _FIELDS = ('code', )
+
+    def __init__(self, code: Return.Code):
+        self.code = code
+
+    def issuccess(self):
+        return False
 
 
 class EventLaunched(AbstractMsgEvent):
+    """ Immutable, decoding always returns the EVENT_LAUNCHED instance """
+    __slots__ = ()
     EXPECTED_LENGTH = 4
     FIRST_BYTE = Return.Code.EVENT_LAUNCHED
 
     @classmethod
-    def parse(cls, msg):
-        ensure_has_end(msg)
-        cls.ensure_has_expected_length(msg)
-        code = Return.Code(msg[0])
-        cls.ensure_has_expected_first_byte(msg, code)
-        return EventLaunched()
+    def decode(cls, msg):
+        return EVENT_LAUNCHED
+
+
+class EventSleepMode(AbstractMsgEvent):
+    """ The device entered sleep mode (automatically or with sleep=1). Immutable, decoding always returns the
+        EVENT_SLEEP_MODE instance
+    """
+    __slots__ = ()
+    EXPECTED_LENGTH = 4
+    FIRST_BYTE = Return.Code.EVENT_ENTER_SLEEP_MODE
+
+    @classmethod
+    def decode(cls, msg):
+        return EVENT_SLEEP_MODE
+
+
+class EventWakeUpMode(AbstractMsgEvent):
+    """ The device woke up from sleep mode. Immutable, decoding always returns the EVENT_WAKE_UP_MODE instance """
+    __slots__ = ()
+    EXPECTED_LENGTH = 4
+    FIRST_BYTE = Return.Code.EVENT_ENTER_WAKE_UP_MODE
+
+    @classmethod
+    def decode(cls, msg):
+        return EVENT_WAKE_UP_MODE
+
+
+class EventUpgraded(AbstractMsgEvent):
+    """ The device is about to upgrade from the SD card. Immutable, decoding always returns the EVENT_UPGRADED
+        instance
+    """
+    __slots__ = ()
+    EXPECTED_LENGTH = 4
+    FIRST_BYTE = Return.Code.EVENT_UPGRADED
+
+    @classmethod
+    def decode(cls, msg):
+        return EVENT_UPGRADED
+
+
+class TransparentDataReady(AbstractMsgEvent):
+    """ The device is ready to receive the data of a transparent transfer (e.g. addt). Immutable, decoding always
+        returns the TRANSPARENT_DATA_READY instance
+    """
+    __slots__ = ()
+    EXPECTED_LENGTH = 4
+    FIRST_BYTE = Return.Code.EVENT_DATA_TR_READY
+
+    @classmethod
+    def decode(cls, msg):
+        return TRANSPARENT_DATA_READY
+
+
+class TransparentDataFinished(AbstractMsgEvent):
+    """ The data of a transparent transfer has been received. Immutable, decoding always returns the
+        TRANSPARENT_DATA_FINISHED instance
+    """
+    __slots__ = ()
+    EXPECTED_LENGTH = 4
+    FIRST_BYTE = Return.Code.EVENT_DATA_TR_FINISHED
+
+    @classmethod
+    def decode(cls, msg):
+        return TRANSPARENT_DATA_FINISHED
 
 
 class EventStartup(AbstractMsgEvent):
     # We don't "parse" this but identify it directly in the loop
-    pass
+    __slots__ = ()
 
 
 class EmptyMessage(AbstractMsgEvent):
+    __slots__ = ()
     EXPECTED_LENGTH = 0
     FIRST_BYTE = None
 
@@ -231,15 +308,30 @@ class EmptyMessage(AbstractMsgEvent):
         return True
 
 
+COMMAND_SUCCEEDED = CommandSucceeded()
+EVENT_LAUNCHED = EventLaunched()
+EVENT_STARTUP = EventStartup()
+EVENT_SLEEP_MODE = EventSleepMode()
+EVENT_WAKE_UP_MODE = EventWakeUpMode()
+EVENT_UPGRADED = EventUpgraded()
+TRANSPARENT_DATA_READY = TransparentDataReady()
+TRANSPARENT_DATA_FINISHED = TransparentDataFinished()
+EMPTY_MESSAGE = EmptyMessage()
+
 D_BYTE0_EVENT = {
     Return.Code.EVENT_LAUNCHED.value: EventLaunched,
+    Return.Code.EVENT_ENTER_SLEEP_MODE.value: EventSleepMode,
+    Return.Code.EVENT_ENTER_WAKE_UP_MODE.value: EventWakeUpMode,
+    Return.Code.EVENT_UPGRADED.value: EventUpgraded,
     Return.Code.CMD_FINISHED.value: CommandSucceeded,
     Return.Code.EVENT_TOUCH_HEAD.value: TouchEvent,
     Return.Code.CURRENT_PAGE_ID_HEAD.value: CurrentPageIDHeadEvent,
     Return.Code.EVENT_POSITION_HEAD.value: PositionHeadEvent,
     Return.Code.EVENT_SLEEP_POSITION_HEAD.value: SleepPositionHeadEvent,
     Return.Code.STRING_HEAD.value: StringHeadEvent,
-    Return.Code.NUMBER_HEAD.value: NumberHeadEvent
+    Return.Code.NUMBER_HEAD.value: NumberHeadEvent,
+    Return.Code.EVENT_DATA_TR_READY.value: TransparentDataReady,
+    Return.Code.EVENT_DATA_TR_FINISHED.value: TransparentDataFinished
 }
 
 NEX_EXCEPTIONS = {
@@ -261,23 +353,73 @@ NEX_EXCEPTIONS = {
 }
 
 
-class MsgEvent:
-    @classmethod
-    def parse(cls, msg):
-        if not msg:
-            return EmptyMessage()
+def _as_buffer(msg):
+    """ Messages are usually bytes or memoryview, but lists of ints are accepted too """
+    if isinstance(msg, (bytes, bytearray, memoryview)):
+        return msg
+    return bytes(msg)
+
+
+COMMAND_FAILURES = {code: CommandFailed(code) for code in NEX_EXCEPTIONS if code != Return.Code.CMD_FINISHED}
+""" The CommandFailed instance of each error code """
 
-        first_byte = msg[0]
-        if first_byte in D_BYTE0_EVENT:
-            evt_typ = D_BYTE0_EVENT[first_byte]
-            return evt_typ.parse(msg)
 
-        code = Return.Code(first_byte)
-        # Unfortunately the "startup" event starts as an INVALID_CMD and must be checked explicitly
-        if code is Return.Code.INVALID_CMD and msg == b'\x00\x00\x00\xFF\xFF\xFF':
-            return EventStartup()
+def _decode_error(code: Return.Code):
+    failure = COMMAND_FAILURES[code]
 
-        if code in NEX_EXCEPTIONS:
-            raise NexMessageException(code)
+    def decode(msg):
+        return failure
+    return decode
 
-        raise NotImplementedError("Code 0x{:02X} unknown".format(first_byte))
+
+def _decode_invalid_cmd(msg):
+    # Unfortunately the "startup" event starts as an INVALID_CMD and must be checked explicitly
+    if msg == b'\x00\x00\x00\xFF\xFF\xFF':
+        return EVENT_STARTUP
+    return COMMAND_FAILURES[Return.Code.INVALID_CMD]
+
+
+def _decode_unknown(msg):
+    raise NotImplementedError("Code 0x{:02X} unknown".format(msg[0]))
+
+
+DECODERS = [_decode_unknown] * 256
+""" Decoding function of each frame indexed by first byte """
+for _code in COMMAND_FAILURES:
+    DECODERS[_code.value] = _decode_error(_code)
+for _first_byte, _event_class in D_BYTE0_EVENT.items():
+    DECODERS[_first_byte] = _event_class.decode
+DECODERS[Return.Code.INVALID_CMD.value] = _decode_invalid_cmd
+del _code, _first_byte, _event_class
+
+
+class MsgEvent:
+    @classmethod
+    def parse(cls, msg):
+        """ Check and decode a message
+            :raises NexMessageException: if the message is malformed or an error code
+        """
+        if not len(msg):
+            return EMPTY_MESSAGE
+
+        msg = _as_buffer(msg)
+        ensure_has_end(msg)
+        event_class = D_BYTE0_EVENT.get(msg[0])
+        if event_class is not None:
+            event_class.ensure_has_expected_length(msg)
+        event = cls.decode(msg)
+        if isinstance(event, CommandFailed):
+            raise NexMessageException(event.code)
+        return event
+
+    @staticmethod
+    def decode(frame):
+        """ Decode a frame already checked by framing.FrameDecoder (complete, with the expected length and
+            terminator) with a single table lookup. Bare responses, error codes included (CommandFailed), are returned
+            as shared immutable instances.
+            :raises NexMessageException: if the frame is malformed
+        """
+        try:
+            return DECODERS[frame[0]](frame)
+        except (IndexError, struct.error) as e:
+            raise NexMessageException("Malformed message %r" % bytes(frame)) from e
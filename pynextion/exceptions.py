@@ -28,3 +28,11 @@ class NexComponentNameException(AbstractNexException):
 
 class NexComponentIdException(AbstractNexException):
     pass
+
+
+class NexCommandException(AbstractNexException):
+    pass
+
+
+class NexBaudrateException(AbstractNexException):
+    pass
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .constants import Return, S_END_OF_CMD
+
+VARIABLE_LENGTH = 0
+" Marker in FRAME_LENGTHS for frames whose end can only be found by looking for the terminator "
+
+FRAME_LENGTHS = [None] * 256
+""" Expected frame length (terminator included) indexed by first byte. None means the byte cannot start a frame. """
+for _code in Return.Code:
+    FRAME_LENGTHS[_code.value] = 4
+FRAME_LENGTHS[Return.Code.EVENT_TOUCH_HEAD.value] = 7
+FRAME_LENGTHS[Return.Code.CURRENT_PAGE_ID_HEAD.value] = 5
+FRAME_LENGTHS[Return.Code.EVENT_POSITION_HEAD.value] = 9
+FRAME_LENGTHS[Return.Code.EVENT_SLEEP_POSITION_HEAD.value] = 9
+FRAME_LENGTHS[Return.Code.STRING_HEAD.value] = VARIABLE_LENGTH
+FRAME_LENGTHS[Return.Code.NUMBER_HEAD.value] = 8
+del _code
+
+STARTUP_FRAME_LENGTH = 6
+" The startup frame (0x00 0x00 0x00 0xFF 0xFF 0xFF) shares its first byte with INVALID_CMD "
+
+
+class FrameDecoder(object):
+    """ Split the incoming byte stream into 0xFFFFFF terminated frames.
+
+        The decoder is incremental: partial frames are kept across calls and only complete frames are returned.
+        Frame boundaries are found using the expected length of each frame type (so payloads containing 0xFF, such
+        as a NUMBER_HEAD carrying -1, are not split) and bytes that cannot start a valid frame are discarded one at
+        a time, which resynchronises the stream in linear time after line noise.
+
+        Incoming data is written straight into an internal buffer (see reserve()/commit()) which is reused as a ring:
+        once everything has been consumed the indexes wrap back to the start, otherwise the unterminated tail is
+        moved back to the start to make room. The buffer only grows when a burst does not fit.
+        Frames are returned as memoryview slices of the internal buffer, so they are valid only until the next
+        call to reserve() or feed().
+    """
+    INITIAL_SIZE = 1024
+    TERMINATOR_SIZE = len(S_END_OF_CMD)
+
+    def __init__(self, size: int = INITIAL_SIZE):
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        # First unconsumed byte
+        self._start = 0
+        # First free byte
+        self._end = 0
+        # Bytes after _start already known not to contain a terminator (variable length frames only)
+        self._scanned = 0
+        # Number of bytes thrown away while resynchronising
+        self.discarded = 0
+
+    def __len__(self) -> int:
+        """ Number of buffered (not yet returned) bytes """
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def reserve(self, size: int) -> memoryview:
+        """ Return a writable view of exactly `size` free bytes at the tail of the buffer, to be filled directly
+            (e.g. by serial.Serial.readinto) and followed by commit().
+        """
+        if self._start == self._end:
+            # Everything consumed, wrap around
+            self._start = self._end = 0
+
+        if len(self._buffer) - self._end < size:
+            pending = self._end - self._start
+            if pending + size > len(self._buffer):
+                # Grow. Do NOT resize in place: frames handed out may still be referencing the old buffer.
+                new_size = len(self._buffer) * 2
+                while new_size < pending + size:
+                    new_size *= 2
+                buffer = bytearray(new_size)
+                buffer[:pending] = self._view[self._start:self._end]
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            else:
+                # Move the partial frame back to the start
+                self._view[:pending] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = pending
+
+        return self._view[self._end:self._end + size]
+
+    def commit(self, size: int):
+        """ Mark `size` bytes of the last reserved space as filled """
+        self._end += size
+
+    def feed(self, data: bytes):
+        """ Append some data to the buffer """
+        size = len(data)
+        self.reserve(size)[:] = data
+        self.commit(size)
+
+    def next_frame(self):
+        """ Return the next complete frame (terminator included) as a memoryview, or None if there is none """
+        buffer = self._buffer
+        while self._start < self._end:
+            start = self._start
+            available = self._end - start
+            length = FRAME_LENGTHS[buffer[start]]
+            if length is None:
+                # Garbage
+                self._discard()
+                continue
+
+            if length == VARIABLE_LENGTH:
+                pos = buffer.find(S_END_OF_CMD, start + max(self._scanned, 1), self._end)
+                if pos == -1:
+                    # Resume from here next time, the terminator may be split across reads
+                    self._scanned = max(available - self.TERMINATOR_SIZE + 1, 1)
+                    return None
+                return self._take(pos + self.TERMINATOR_SIZE - start)
+
+            if buffer[start] == 0x00:
+                if available < 2:
+                    return None
+                if buffer[start + 1] == 0x00:
+                    length = STARTUP_FRAME_LENGTH
+
+            if available < length:
+                return None
+
+            end = start + length
+            if buffer[end - 1] == 0xFF and buffer[end - 2] == 0xFF and buffer[end - 3] == 0xFF:
+                return self._take(length)
+
+            # Right first byte, wrong terminator
+            self._discard()
+
+        return None
+
+    def _take(self, length: int) -> memoryview:
+        start = self._start
+        self._start += length
+        self._scanned = 0
+        return self._view[start:self._start]
+
+    def _discard(self):
+        self._start += 1
+        self._scanned = 0
+        self.discarded += 1
+
+    def clear(self):
+        self._start = self._end = 0
+        self._scanned = 0
@@ -1,12 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import collections
 import queue
 import threading
-import typing
 
 from .constants import S_END_OF_CMD
+from .framing import FrameDecoder
 
 try:
     import serial
@@ -23,11 +22,11 @@ class AbstractSerialNex(object):
     def __init__(self):
         super().__init__()
         self._port_mutex = threading.Lock()
+        self._read_mutex = threading.Lock()
         # Queue of event objects
         self._events = queue.Queue()
-        # Incoming serial buffer
-        self._buffer = bytearray(self.INCOMING_BUFFER_SIZE)
-        self._events_queue = collections.deque()  # type: typing.Sequence[bytearray]
+        # Incoming serial data, split into events
+        self._decoder = FrameDecoder(self.INCOMING_BUFFER_SIZE)
 
     def write(self, data: bytes) -> int:
         """ Raw write access to underlying transport. Threadsafe.
@@ -47,42 +46,46 @@ class AbstractSerialNex(object):
         return data
 
     def read_next(self) -> bytes:
-        """ Read next message. Threadsafe. May return an empty array is no event is available. """
+        """ Read next message. Threadsafe. Never blocks: returns an empty array if no complete event is available,
+            partial events are kept until the rest comes in.
+            The message is a memoryview on the internal buffer, valid until the next call.
+        """
         # At some point (along with editor 0.58) the Nextion firmware changed and now it returns
         # an "instruction successful" everytime, even after a string or numeric data event
-        if self._events_queue:
-            return self._events_queue.pop()
+        with self._read_mutex:
+            frame = self._decoder.next_frame()
+            if frame is not None:
+                return frame
+
+            # Hold the port only for the time needed to copy what is already there
+            with self._port_mutex:
+                in_waiting = self.sp.in_waiting
+                if not in_waiting:
+                    return b''
+                nbytes = self.sp.readinto(self._decoder.reserve(in_waiting))
+
+            self._decoder.commit(nbytes)
+            frame = self._decoder.next_frame()
+
+        return b'' if frame is None else frame
+
+    @property
+    def baudrate(self) -> int:
+        return self.sp.baudrate
+
+    def set_baudrate(self, baudrate: int):
+        """ Reconfigure the port speed. Threadsafe. Data already written is sent at the previous speed, incoming
+            data not read yet is discarded.
+        """
+        with self._read_mutex, self._port_mutex:
+            self.sp.flush()
+            self.sp.baudrate = baudrate
+            self.sp.reset_input_buffer()
+            self._decoder.clear()
 
-        buffer_size = 0
-        with self._port_mutex:
-            # Reading one byte at a time is of course inefficient, so serial.read_until is not the best option
-            # We know the minimal read should be 4 chars (i.e. Invalid Instruction) and must be prepared to
-            # partial command reads since we have no guarantee that we will always have complete commands in the buffer
-            if self.sp.in_waiting < self.MIN_SIZE_READ:
-                # Partial event, unlikely at this point
-                return b''
-
-            # Read bulk of data
-            chunk = self.sp.read(self.sp.in_waiting)
-            self._buffer[buffer_size:buffer_size+len(chunk)] = chunk
-            buffer_size = len(chunk)
-            while self._buffer[buffer_size - self.TERMINATOR_SIZE:buffer_size] != S_END_OF_CMD:
-                # Trickle until end of event
-                chunk = self.sp.read(1)
-                self._buffer[buffer_size:buffer_size+1] = chunk
-                buffer_size += 1
-
-        # Finished reading and we are sure we have complete event(s), now split into single events
-        start = 0
-        while True:
-            pos = self._buffer.find(S_END_OF_CMD, start, buffer_size)
-            if pos == -1:
-                break
-
-            self._events_queue.appendleft(self._buffer[start:pos+self.TERMINATOR_SIZE])
-            start = pos + self.TERMINATOR_SIZE
-
-        return self._events_queue.pop()
+    def fileno(self) -> int:
+        """ File descriptor of the underlying port, for select() and asyncio readers """
+        return self.sp.fileno()
 
     def close(self):
         return self.sp.close()
@@ -97,7 +100,7 @@ if _HAS_PYSERIAL:
             self.sp.reset_output_buffer()
 
 
-# TODO: rotten
+# TODO: rotten, use simulator.SimulatedNex instead
 class NexSerialMock(AbstractSerialNex):
     def __init__(self, *args, **kwargs):
         super().__init__()
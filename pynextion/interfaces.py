@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import typing
+
 from PyQt5.QtCore import pyqtProperty, pyqtSignal, pyqtSlot
 
 from .commands import GetPropertyCommand, SetPropertyCommand
@@ -27,20 +29,102 @@ class NxInterface(object):
             [self._refresh_internal(var) for var in self.ONETIME_REFRESH_VARIABLES]
 
     @pyqtSlot()
-    def _refresh_internal(self, property_name: str):
-        # No need to keep a reference to the command
-        command = GetPropertyCommand(self.name, property_name, self._on_get_property_command_successful)
+    def _refresh_internal(self, property_name: str) -> GetPropertyCommand:
+        """ Enqueue the refresh of a property. There is a single, preformatted, command per property which is reused
+            (like NexDevice does with SENDME) and not enqueued again while it, or a get() of the same property, is
+            pending.
+        """
+        pending = self._pending_get(property_name)
+        if pending is not None:
+            # Still queued or waiting for a response
+            return pending
+
+        command = self._refresh_commands.get(property_name)
+        if command is None:
+            command = GetPropertyCommand(self.name, property_name, self._on_get_property_command_successful,
+                                         decoder=self._decode_property)
+            self._refresh_commands[property_name] = command
+        else:
+            command.reset()
+
         self.send_command(command)
+        return command
 
-    @pyqtSlot()
-    def _on_get_property_command_successful(self):
-        command = self.sender()
-        # Usually the data_event uses the "value" attribute, but subclasses may use different stuff, see
-        # INumericalUnsignedValued
+    def get(self, property_name: str) -> GetPropertyCommand:
+        """ Enqueue a read of the specified property, the properties cache will be updated on completion.
+            Return the command, which can be awaited from asyncio to get the value.
+            If a read of the same property is already pending, no other command is enqueued and the pending one is
+            returned instead (it may be the reusable refresh command, so do not connect callbacks permanently).
+        """
+        pending = self._pending_get(property_name)
+        if pending is not None:
+            return pending
+
+        command = GetPropertyCommand(self.name, property_name, self._on_get_property_command_successful,
+                                     decoder=self._decode_property)
+        self._pending_gets[property_name] = command
+        self.send_command(command)
+        return command
+
+    def _pending_get(self, property_name: str) -> typing.Union[GetPropertyCommand, None]:
+        """ Return the read of property_name which is queued or waiting for a response, if any """
+        for command in (self._refresh_commands.get(property_name), self._pending_gets.get(property_name)):
+            if command is not None and not command.completed:
+                return command
+        return None
+
+    def _set_property(self, property_name: str, value) -> typing.Union[SetPropertyCommand, None]:
+        """ Enqueue a property change, last writer wins: if a change of the same property is still waiting to be
+            sent its value is replaced instead of enqueuing another command, and a change to the cached value is
+            skipped (None is returned). On success the cache is updated and value_changed emitted.
+        """
+        command = self._pending_sets.get(property_name)
+        if command is not None:
+            if self.device is not None:
+                # The device may be sending it right now
+                if self.device.update_queued_value(command, value):
+                    return command
+            elif command.status == command.Status.CREATED:
+                command.update_value(value)
+                return command
+        elif property_name in self._properties_cache and self._properties_cache[property_name] == value:
+            return None
+
+        command = SetPropertyCommand(self.name, property_name, value,
+                                     on_successful=self._on_set_property_command_successful,
+                                     on_failed=self._on_set_property_command_failed)
+        self._pending_sets[property_name] = command
+        self.send_command(command)
+        return command
+
+    def _on_set_property_command_successful(self, command: SetPropertyCommand):
+        # Update cache and send value_changed signal
+        self._release_set_property_command(command)
+        previous = self._properties_cache.get(command.property_name, None)
+        self._properties_cache[command.property_name] = command.new_value
+        if previous != command.new_value:
+            self.value_changed.emit(command.new_value)
+
+    def _on_set_property_command_failed(self, command: SetPropertyCommand):
+        self._release_set_property_command(command)
+
+    def _release_set_property_command(self, command: SetPropertyCommand):
+        if self._pending_sets.get(command.property_name) is command:
+            del self._pending_sets[command.property_name]
+
+    def _decode_property(self, event):
+        """ Property value from a get response. Usually the data_event uses the "value" attribute, but subclasses
+            may use different stuff, see INumericalSignedValued
+        """
+        return event.value
+
+    def _on_get_property_command_successful(self, command: GetPropertyCommand):
+        # Decoded by _decode_property, the same value an awaiting coroutine gets
+        value = command.result
         previous = self._properties_cache.get(command.property_name, None)
-        self._properties_cache[command.property_name] = command.data_event.value
-        if previous != command.data_event.value:
-            self.value_changed.emit(command.data_event.value)
+        self._properties_cache[command.property_name] = value
+        if previous != value:
+            self.value_changed.emit(value)
 
 
 class INumericalUnsignedValued(NxInterface):
@@ -52,36 +136,23 @@ class INumericalUnsignedValued(NxInterface):
 
     @value.setter
     def value(self, value: int):
-        self.send_command(SetPropertyCommand(self.name, "val", value, on_successful=self._on_set_property_command_successful))
+        self._set_property("val", value)
 
     @pyqtSlot(int)
     def set_value(self, value):
         self.value = value
 
-    @pyqtSlot()
-    def _on_set_property_command_successful(self):
-        command = self.sender()
-        # Update cache and send value_changed signal
-        previous = self._properties_cache.get(command.property_name, None)
-        self._properties_cache[command.property_name] = command.new_value
-        if previous != command.new_value:
-            self.value_changed.emit(command.new_value)
-
 
 class INumericalSignedValued(INumericalUnsignedValued):
-    @pyqtSlot()
-    def _on_get_property_command_successful(self):
-        command = self.sender()
+    def _decode_property(self, event):
         # NumberHeadEvent
-        self._properties_cache[command.property_name] = command.data_event.signed_value
+        return event.signed_value
 
 
 class IBooleanValued(INumericalUnsignedValued):
-    @pyqtSlot()
-    def _on_get_property_command_successful(self):
-        command = self.sender()
+    def _decode_property(self, event):
         # NumberHeadEvent
-        self._properties_cache[command.property_name] = bool(command.data_event.value)
+        return bool(event.value)
 
 
 class IStringValued(NxInterface):
@@ -93,7 +164,7 @@ class IStringValued(NxInterface):
 
     @text.setter
     def text(self, value):
-        self.send_command(SetPropertyCommand(self.name, "txt", value))
+        self._set_property("txt", value)
 
     @pyqtSlot(str)
     def set_text(self, txt):
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .commands import CommandBase
+
+__all__ = ['QtCommandAdapter']
+
+
+class QtCommandAdapter(QObject):
+    """ Relay command completion callbacks as Qt signals, for GUI code that needs them (e.g. queued connections to
+        update widgets from the poller thread). One adapter can be attached to any number of commands.
+    """
+
+    successful = pyqtSignal(object)
+    """ Emitted when an attached command is successful. Parameter is the command. """
+
+    failed = pyqtSignal(object)
+    """ Emitted when an attached command fails. Parameter is the command. """
+
+    def __init__(self, command: CommandBase = None, parent=None):
+        super().__init__(parent)
+        if command is not None:
+            self.attach(command)
+
+    def attach(self, command: CommandBase) -> CommandBase:
+        command.successful.connect(self._on_successful)
+        command.failed.connect(self._on_failed)
+        return command
+
+    def detach(self, command: CommandBase) -> CommandBase:
+        command.successful.disconnect(self._on_successful)
+        command.failed.disconnect(self._on_failed)
+        return command
+
+    def _on_successful(self, command: CommandBase):
+        self.successful.emit(command)
+
+    def _on_failed(self, command: CommandBase):
+        self.failed.emit(command)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import typing
+
+from . import draw
+from .color import BACKCOLOR_DEFAULT
+from .commands import CommandBase
+from .constants import Background
+
+__all__ = ['Scene']
+
+Box = typing.Tuple[int, int, int, int]
+" (x, y, width, height) "
+
+
+def _intersects(a: typing.Union[Box, None], b: typing.Union[Box, None]) -> bool:
+    # None is an unknown area, i.e. possibly the whole screen
+    if a is None or b is None:
+        return True
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class Primitive(object):
+    """ A drawing primitive of a Scene: its encoded command and the area it covers """
+    __slots__ = ('command', 'box')
+
+    def __init__(self, command: bytes, box: typing.Union[Box, None]):
+        self.command = command
+        self.box = box
+
+    def __repr__(self):
+        return "Primitive({0.command!r}, {0.box})".format(self)
+
+
+class _Recorder(object):
+    """ Keeps the last command formatted by a function of the draw module """
+    __slots__ = ('command', )
+
+    def send(self, cmd: str):
+        self.command = CommandBase.format_command(cmd)
+
+
+class Scene(object):
+    """ Retained mode drawing on top of pynextion.draw: describe the whole frame every time, render() returns a
+        DisplayList with just what changed since the previous frame.
+
+        >>> scene = Scene(background=NamedColor.BLACK)
+        >>> scene.line(0, 160, 479, 160, NamedColor.GRAY)  # static, sent only the first time
+        >>> scene.xstr("%d rpm" % rpm, 10, 10, 100, 30)
+        >>> device.draw(scene.render())
+
+        Primitives no longer in the frame are erased filling their area with the background colour. Unchanged
+        primitives are sent again only if they overlap an erased area or a primitive drawn before them, to keep
+        the stacking order. The first frame (and the first after invalidate()) is drawn from scratch, clearing the
+        screen first.
+    """
+
+    def __init__(self, background=BACKCOLOR_DEFAULT, max_size: int = None):
+        """
+        :param background: Colour used to erase primitives
+        :param max_size: Maximum batch size of the display lists returned by render(), see draw.DisplayList
+        """
+        self.background = background
+        self.max_size = max_size
+        self._previous = None  # type: typing.Union[typing.List[Primitive], None]
+        self._current = []  # type: typing.List[Primitive]
+        self._recorder = _Recorder()
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def invalidate(self):
+        """ Draw the next frame from scratch, e.g. after switching page """
+        self._previous = None
+
+    def _add(self, box: typing.Union[Box, None]):
+        self._current.append(Primitive(self._recorder.command, box))
+
+    # Primitives, see pynextion.draw ------------------------------------------
+    def rectangle(self, x1, y1, x2, y2, colour=None, mode=Background.NOBACKCOLOUR):
+        draw.rectangle(self._recorder, x1, y1, x2, y2, colour, mode)
+        if mode == Background.SOLIDCOLOUR:
+            self._add((x1, y1, x2 - x1, y2 - y1))
+        else:
+            self._add((x1, y1, x2 - x1 + 1, y2 - y1 + 1))
+
+    def circle(self, x, y, r, colour=None, mode=Background.NOBACKCOLOUR):
+        draw.circle(self._recorder, x, y, r, colour, mode)
+        x0 = max(x - r, 0)
+        y0 = max(y - r, 0)
+        self._add((x0, y0, x + r + 1 - x0, y + r + 1 - y0))
+
+    def xstr(self, s, x, y, w, h, *args, **kwargs):
+        draw.xstr(self._recorder, s, x, y, w, h, *args, **kwargs)
+        self._add((x, y, w, h))
+
+    def line(self, x1, y1, x2, y2, colour=None):
+        draw.line(self._recorder, x1, y1, x2, y2, colour)
+        self._add((min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1))
+
+    def picture(self, x, y, pic, w=None, h=None, x0=None, y0=None):
+        draw.picture(self._recorder, x, y, pic, w, h, x0, y0)
+        # Without w and h the picture size is not known
+        self._add(None if w is None else (x, y, w, h))
+
+    # ~Primitives -------------------------------------------------------------
+
+    def render(self) -> draw.DisplayList:
+        """ Return the commands turning the previous frame into the current one and start a new, empty, frame """
+        display_list = draw.DisplayList() if self.max_size is None else draw.DisplayList(self.max_size)
+        current, previous = self._current, self._previous
+        self._previous = current
+        self._current = []
+
+        if previous is not None:
+            # Primitives no longer there, taking duplicates into account
+            remaining = collections.Counter(primitive.command for primitive in current)
+            erased = []
+            for primitive in previous:
+                if remaining[primitive.command]:
+                    remaining[primitive.command] -= 1
+                else:
+                    erased.append(primitive)
+            if any(primitive.box is None for primitive in erased):
+                previous = None
+
+        if previous is None:
+            draw.cls(display_list, self.background)
+            for primitive in current:
+                display_list.append(primitive.command)
+            return display_list
+
+        for primitive in erased:
+            x, y, w, h = primitive.box
+            draw.rectangle(display_list, x, y, x + w, y + h, self.background, Background.SOLIDCOLOUR)
+
+        # Primitives not drawn in the previous frame
+        existing = collections.Counter(primitive.command for primitive in previous)
+        dirty = [primitive.box for primitive in erased]
+        for primitive in current:
+            if existing[primitive.command]:
+                existing[primitive.command] -= 1
+                if not any(_intersects(primitive.box, box) for box in dirty):
+                    continue
+            display_list.append(primitive.command)
+            dirty.append(primitive.box)
+        return display_list
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import typing
+
+from .commands import GetPropertyCommand
+
+__all__ = ['RefreshScheduler']
+
+
+class RefreshEntry(object):
+    """ Refresh state of a single (widget, property) pair """
+    __slots__ = ('scheduler', 'widget', 'property_name', 'priority', 'period', 'min_period', 'max_period', 'due',
+                 'cost', 'command', 'last_value')
+
+    def __init__(self, scheduler, widget, property_name: str, period: float, min_period: float, max_period: float,
+                 priority: int):
+        self.scheduler = scheduler
+        self.widget = widget
+        self.property_name = property_name
+        self.priority = priority
+        self.period = period
+        self.min_period = min_period
+        self.max_period = max_period
+        # Refresh as soon as possible
+        self.due = 0.0
+        # Link usage [bytes]: "get <name>.<property>\xFF\xFF\xFF" plus the response
+        self.cost = len(widget.name) + len(property_name) + 8 + scheduler.RESPONSE_SIZE
+        self.command = None  # type: GetPropertyCommand
+        self.last_value = None
+
+    @property
+    def pending(self) -> bool:
+        return self.command is not None and not self.command.completed
+
+    def _on_refreshed(self, command: GetPropertyCommand):
+        # Connected after the widget handler, so the cache is already up to date
+        value = self.widget._properties_cache.get(self.property_name)
+        scheduler = self.scheduler
+        if value != self.last_value:
+            self.period = max(self.min_period, self.period * scheduler.speedup)
+        else:
+            self.period = min(self.max_period, self.period * scheduler.backoff)
+        self.last_value = value
+        self.due = scheduler.clock() + self.period
+
+    def _on_failed(self, command: GetPropertyCommand):
+        self.due = self.scheduler.clock() + self.max_period
+
+
+class RefreshScheduler(object):
+    """ Decide when each widget property of the current page is refreshed, replacing the refresh of every
+        REFRESH_VARIABLES on each idle poll cycle. Install it with NexDevice.refresh_scheduler.
+
+        Every (widget, property) pair has its own refresh period and priority. The period shrinks (down to
+        min_period) every time a refresh finds a new value and grows (up to max_period) when the value did not
+        change, so a slider being dragged is polled often and a static label is almost never polled.
+        If link_budget is set (bytes per second, see for_baudrate()) refreshes are rate limited with a token bucket
+        and, when not all due refreshes fit, those with higher priority (then the most overdue) go first.
+    """
+    RESPONSE_SIZE = 12
+    " Estimated size of the answer to a get: a NUMBER_HEAD (8 bytes) and an ack (4 bytes) "
+
+    def __init__(self, period: float = 0.1, min_period: float = 0.05, max_period: float = 2.0,
+                 backoff: float = 1.5, speedup: float = 0.5, link_budget: float = None,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        """
+        :param period: Initial refresh period [s]
+        :param min_period: Default minimum refresh period [s]
+        :param max_period: Default maximum refresh period [s]
+        :param backoff: Period multiplier applied when a refresh does not find a new value
+        :param speedup: Period multiplier applied when a refresh finds a new value
+        :param link_budget: Maximum refresh traffic (commands and responses) [bytes/s], None for no limit
+        :param clock: Monotonic time source
+        """
+        self.period = period
+        self.min_period = min_period
+        self.max_period = max_period
+        self.backoff = backoff
+        self.speedup = speedup
+        self.link_budget = link_budget
+        self.clock = clock
+        self._entries = {}  # type: typing.Dict[typing.Tuple[typing.Any, str], RefreshEntry]
+        # Token bucket
+        self._tokens = 0.0
+        self._tokens_updated = None
+
+    @classmethod
+    def for_baudrate(cls, baudrate: int, utilisation: float = 0.5, **kwargs) -> 'RefreshScheduler':
+        """ Create a scheduler using at most the given fraction of a serial link (8N1: 10 bits per byte) """
+        return cls(link_budget=baudrate / 10.0 * utilisation, **kwargs)
+
+    def configure(self, widget, property_name: str, period: float = None, min_period: float = None,
+                  max_period: float = None, priority: int = None):
+        """ Override the defaults for a single widget property """
+        entry = self._entry(widget, property_name)
+        if min_period is not None:
+            entry.min_period = min_period
+        if max_period is not None:
+            entry.max_period = max_period
+        if period is not None:
+            entry.period = period
+        if priority is not None:
+            entry.priority = priority
+        entry.period = min(max(entry.period, entry.min_period), entry.max_period)
+
+    def _entry(self, widget, property_name: str) -> RefreshEntry:
+        key = (widget, property_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = RefreshEntry(self, widget, property_name, self.period, self.min_period, self.max_period, 0)
+            self._entries[key] = entry
+        return entry
+
+    def _entries_of(self, page) -> typing.List[RefreshEntry]:
+        # Not cached: widgets may be hooked, or their REFRESH_VARIABLES changed, at any time
+        return [self._entry(widget, property_name)
+                for widget in page.widgets if widget.REFRESH_VARIABLES
+                for property_name in widget.REFRESH_VARIABLES]
+
+    def _refill(self, now: float):
+        if self._tokens_updated is None:
+            self._tokens = self.link_budget
+        else:
+            # Allow bursts of up to one second worth of traffic
+            self._tokens = min(self.link_budget, self._tokens + (now - self._tokens_updated) * self.link_budget)
+        self._tokens_updated = now
+
+    def refresh(self, page) -> int:
+        """ Enqueue the refresh of the properties of page which are due. Return the number of refreshes enqueued. """
+        if page.page_switch_in_progress:
+            return 0
+
+        now = self.clock()
+        due = [entry for entry in self._entries_of(page) if entry.due <= now and not entry.pending]
+        if not due:
+            return 0
+
+        if self.link_budget is not None:
+            self._refill(now)
+            if len(due) > 1:
+                due.sort(key=lambda entry: (-entry.priority, entry.due))
+
+        enqueued = 0
+        for entry in due:
+            if self.link_budget is not None:
+                if self._tokens < entry.cost:
+                    break
+                self._tokens -= entry.cost
+
+            command = entry.widget._refresh_internal(entry.property_name)
+            if command is not entry.command:
+                # Usually the widget refresh command, reused from then on, but it may be a pending one-off get()
+                if entry.command is not None:
+                    entry.command.successful.disconnect(entry._on_refreshed)
+                    entry.command.failed.disconnect(entry._on_failed)
+                entry.command = command
+                command.successful.connect(entry._on_refreshed)
+                command.failed.connect(entry._on_failed)
+            # Rescheduled on completion
+            entry.due = now + entry.max_period
+            enqueued += 1
+
+        return enqueued
+
+    def next_refresh_delay(self, page) -> typing.Union[float, None]:
+        """ Time [s] until the next refresh is due on page, None if nothing is to be refreshed """
+        entries = [entry for entry in self._entries_of(page) if not entry.pending]
+        if not entries:
+            return None
+        first = min(entries, key=lambda entry: entry.due)
+        delay = first.due - self.clock()
+        if self.link_budget is not None and self._tokens < first.cost:
+            # Wait for the bucket to refill
+            delay = max(delay, (first.cost - self._tokens) / self.link_budget)
+        return max(delay, 0.0)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import io
+import logging
+import struct
+import threading
+import time
+import typing
+
+from .constants import Baudrate, Return, S_END_OF_CMD
+from .hardware import AbstractSerialNex
+
+__all__ = ['NexSimulator', 'SimulatedNex']
+
+DRAW_INSTRUCTIONS = frozenset(("cls", "line", "draw", "fill", "cir", "cirs", "xstr", "pic", "picq", "xpic", "ref"))
+
+
+class SimulatedComponent(object):
+    """ A component of a simulated page: a name, an ID and a dict of attributes (e.g. "val", "txt") """
+    __slots__ = ('name', 'cid', 'attributes')
+
+    def __init__(self, name: str, cid: int, attributes: typing.Dict[str, typing.Union[int, str]]):
+        self.name = name
+        self.cid = cid
+        self.attributes = attributes
+
+    def __repr__(self):
+        return "SimulatedComponent({0.name!r}, {0.cid}, {0.attributes!r})".format(self)
+
+
+class SimulatedPage(object):
+    __slots__ = ('name', 'pid', 'components', 'components_by_cid')
+
+    def __init__(self, name: str, pid: int):
+        self.name = name
+        self.pid = pid
+        self.components = {}  # type: typing.Dict[str, SimulatedComponent]
+        self.components_by_cid = {}  # type: typing.Dict[int, SimulatedComponent]
+
+
+class NexSimulator(object):
+    """ In-process model of a Nextion display, answering the instructions used by this library:
+        get, assignments, page, sendme, bkcmd, vis, baud/bauds, the drawing instructions, add and addt.
+
+        Bytes travel on a simulated serial line. With a timing model (see `timed`) a frame is received only after the
+        time needed to transmit it at the current baud rate (10 bits per byte, 8N1), each instruction takes
+        `instruction_time` to execute and responses are queued on the line back to the host, so throughput and
+        latency measured against the simulator depend on the link speed like on real hardware.
+
+        Touch events can be injected with touch(), everything drawn is logged in `drawn` and waveform data in
+        `waveforms`.
+    """
+
+    def __init__(self, baudrate: int = 9600, timed: bool = True, instruction_time: float = 0.0,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        """
+        :param baudrate: Initial device baud rate
+        :param timed: If False everything is instantaneous
+        :param instruction_time: Time [s] needed to execute each instruction
+        :param clock: Monotonic time source, e.g. a fake one for deterministic tests
+        """
+        self._logger = logging.getLogger("pynextion.NexSimulator")
+        self.baudrate = baudrate
+        self.timed = timed
+        self.instruction_time = instruction_time
+        self.clock = clock
+        self.mode = Return.Mode.FAIL_ONLY
+        self.variables = {"dim": 100, "dims": 100, "sleep": 0, "thsp": 0, "thup": 0}  # type: typing.Dict[str, int]
+        self.pages = {}  # type: typing.Dict[int, SimulatedPage]
+        self.current_page = None  # type: SimulatedPage
+        self.drawn = []  # type: typing.List[str]
+        self.waveforms = collections.defaultdict(list)  # type: typing.Dict[typing.Tuple[int, int], typing.List[int]]
+        self.instructions = 0
+        self._lock = threading.Lock()
+        # Host -> device: bytes received and not executed yet
+        self._incoming = bytearray()
+        # (cid, channel, remaining bytes) while receiving addt transparent data
+        self._transparent = None
+        # End of the transmission currently on the line, in each direction
+        self._rx_busy_until = 0.0
+        self._tx_busy_until = 0.0
+        # End of the execution of the last instruction
+        self._busy_until = 0.0
+        # Device -> host: (time when completely received, frame)
+        self._outgoing = collections.deque()
+
+    # Setup -------------------------------------------------------------------
+    def add_page(self, name: str, pid: int) -> SimulatedPage:
+        page = SimulatedPage(name, pid)
+        self.pages[pid] = page
+        if self.current_page is None:
+            self.current_page = page
+        return page
+
+    def add_component(self, pid: int, name: str, cid: int, **attributes) -> SimulatedComponent:
+        """ Add a component to a page. Attributes are its initial values, e.g. val=0 or txt="" """
+        attributes.setdefault("vis", 1)
+        component = SimulatedComponent(name, cid, attributes)
+        page = self.pages[pid]
+        page.components[name] = component
+        page.components_by_cid[cid] = component
+        return component
+
+    # ~Setup ------------------------------------------------------------------
+
+    # Line --------------------------------------------------------------------
+    def byte_time(self, nbytes: int) -> float:
+        """ Time [s] needed to transmit nbytes at the current baud rate """
+        return nbytes * 10.0 / self.baudrate if self.timed else 0.0
+
+    def receive(self, data: bytes, baudrate: int):
+        """ Bytes written by the host at the specified baud rate """
+        with self._lock:
+            if baudrate != self.baudrate:
+                # Garbage on the line
+                return
+            start = max(self._rx_busy_until, self.clock())
+            self._rx_busy_until = start + self.byte_time(len(data))
+            first = len(self._incoming)
+            self._incoming += data
+            self._execute_received(start - self.byte_time(first))
+
+    def in_waiting(self, baudrate: int) -> int:
+        with self._lock:
+            if baudrate != self.baudrate:
+                return 0
+            now = self.clock()
+            return sum(len(frame) for ready, frame in self._outgoing if ready <= now)
+
+    def read(self, size: int, baudrate: int) -> bytes:
+        with self._lock:
+            if baudrate != self.baudrate:
+                return b''
+            now = self.clock()
+            data = bytearray()
+            while self._outgoing and self._outgoing[0][0] <= now and len(data) < size:
+                ready, frame = self._outgoing.popleft()
+                room = size - len(data)
+                if len(frame) > room:
+                    # Leave the rest for the next read
+                    self._outgoing.appendleft((ready, frame[room:]))
+                    frame = frame[:room]
+                data += frame
+            return bytes(data)
+
+    def reset_output(self):
+        with self._lock:
+            self._outgoing.clear()
+
+    def _send(self, frame: bytes, at: float):
+        """ Queue a frame to be transmitted to the host no earlier than `at` """
+        start = max(self._tx_busy_until, at)
+        self._tx_busy_until = start + self.byte_time(len(frame))
+        self._outgoing.append((self._tx_busy_until, frame))
+
+    def _execute_received(self, origin: float):
+        """ Execute the instructions completed by the bytes received. The n-th buffered byte has been received at
+            origin + byte_time(n + 1).
+        """
+        while self._incoming:
+            if self._transparent is not None:
+                nbytes = self._receive_transparent()
+                instruction = None
+            else:
+                end = self._incoming.find(S_END_OF_CMD)
+                if end == -1:
+                    break
+                nbytes = end + len(S_END_OF_CMD)
+                instruction = bytes(self._incoming[:end]).decode('latin1')
+            del self._incoming[:nbytes]
+            origin += self.byte_time(nbytes)
+            # Instructions are executed one at a time
+            if instruction is not None:
+                self._busy_until = max(self._busy_until, origin) + self.instruction_time
+                self._execute(instruction, self._busy_until)
+            elif self._transparent is None:
+                self._busy_until = max(self._busy_until, origin)
+                self._send(bytes((Return.Code.EVENT_DATA_TR_FINISHED.value, )) + S_END_OF_CMD, self._busy_until)
+
+    def _receive_transparent(self) -> int:
+        """ Store the addt data received so far, return its size """
+        cid, channel, remaining = self._transparent
+        data = self._incoming[:remaining]
+        self.waveforms[(cid, channel)].extend(data)
+        remaining -= len(data)
+        self._transparent = (cid, channel, remaining) if remaining else None
+        return len(data)
+
+    # ~Line -------------------------------------------------------------------
+
+    # Instructions ------------------------------------------------------------
+    def _reply(self, code: Return.Code, at: float):
+        """ Send a return code, if the bkcmd mode requires it """
+        if code == Return.Code.CMD_FINISHED:
+            if self.mode not in (Return.Mode.SUCCESS_ONLY, Return.Mode.ALWAYS):
+                return
+        elif self.mode not in (Return.Mode.FAIL_ONLY, Return.Mode.ALWAYS):
+            return
+        self._send(bytes((code.value, )) + S_END_OF_CMD, at)
+
+    def _execute(self, instruction: str, at: float):
+        self.instructions += 1
+        name, _, params = instruction.partition(" ")
+        try:
+            if name == "get":
+                code = self._get(params, at)
+            elif name == "sendme":
+                page_id = struct.pack("<BB", Return.Code.CURRENT_PAGE_ID_HEAD.value, self.current_page.pid)
+                self._send(page_id + S_END_OF_CMD, at)
+                code = Return.Code.CMD_FINISHED
+            elif name == "page":
+                code = self._page(params)
+            elif name == "vis":
+                code = self._vis(params)
+            elif name in DRAW_INSTRUCTIONS:
+                self.drawn.append(instruction)
+                code = Return.Code.CMD_FINISHED
+            elif name == "add":
+                cid, channel, value = (int(param) for param in params.split(","))
+                self.waveforms[(cid, channel)].append(value & 0xFF)
+                code = Return.Code.CMD_FINISHED
+            elif name == "addt":
+                cid, channel, nbytes = (int(param) for param in params.split(","))
+                self._transparent = (cid, channel, nbytes)
+                self._send(bytes((Return.Code.EVENT_DATA_TR_READY.value, )) + S_END_OF_CMD, at)
+                return
+            elif name == "rest":
+                self._send(b'\x00\x00\x00' + S_END_OF_CMD, at)
+                self._send(bytes((Return.Code.EVENT_LAUNCHED.value, )) + S_END_OF_CMD, at)
+                self.mode = Return.Mode.FAIL_ONLY
+                return
+            elif "=" in name:
+                code = self._assign(*instruction.split("=", 1), at=at)
+            else:
+                code = Return.Code.INVALID_CMD
+        except ValueError:
+            code = Return.Code.INVALID_PARAMETER_QUANTITY
+        if code is not None:
+            self._reply(code, at)
+
+    def _component(self, name: str) -> typing.Union[SimulatedComponent, None]:
+        return self.current_page.components.get(name)
+
+    def _get(self, params: str, at: float) -> Return.Code:
+        if "." in params:
+            name, attribute = params.split(".", 1)
+            component = self._component(name)
+            if component is None:
+                return Return.Code.INVALID_COMPONENT_ID
+            if attribute not in component.attributes:
+                return Return.Code.INVALID_VARIABLE
+            value = component.attributes[attribute]
+        elif params in self.variables:
+            value = self.variables[params]
+        else:
+            return Return.Code.INVALID_VARIABLE
+
+        if isinstance(value, str):
+            self._send(bytes((Return.Code.STRING_HEAD.value, )) + value.encode('latin1') + S_END_OF_CMD, at)
+        else:
+            self._send(struct.pack("<Bi", Return.Code.NUMBER_HEAD.value, value) + S_END_OF_CMD, at)
+        return Return.Code.CMD_FINISHED
+
+    def _assign(self, target: str, value: str, at: float) -> Return.Code:
+        if value.startswith('"') and value.endswith('"') and len(value) > 1:
+            value = value[1:-1]
+
+        if "." not in target:
+            if target == "bkcmd":
+                self.mode = Return.Mode(int(value))
+                return Return.Code.CMD_FINISHED
+            if target in ("baud", "bauds"):
+                return self._baud(int(value), at)
+            self.variables[target] = int(value)
+            return Return.Code.CMD_FINISHED
+
+        name, attribute = target.split(".", 1)
+        component = self._component(name)
+        if component is None:
+            return Return.Code.INVALID_COMPONENT_ID
+        if attribute not in component.attributes:
+            return Return.Code.INVALID_VARIABLE
+        if not isinstance(component.attributes[attribute], str):
+            value = int(value)
+        component.attributes[attribute] = value
+        return Return.Code.CMD_FINISHED
+
+    def _baud(self, baudrate: int, at: float) -> typing.Union[Return.Code, None]:
+        if baudrate not in Baudrate.SUPPORTED:
+            return Return.Code.INVALID_BAUD
+        # Answer at the old rate, then switch
+        self._reply(Return.Code.CMD_FINISHED, at)
+        self.baudrate = baudrate
+        return None
+
+    def _page(self, params: str) -> Return.Code:
+        page = None
+        if params.isdigit():
+            page = self.pages.get(int(params))
+        else:
+            for candidate in self.pages.values():
+                if candidate.name == params:
+                    page = candidate
+                    break
+        if page is None:
+            return Return.Code.INVALID_PAGE_ID
+        self.current_page = page
+        # Waveforms lose their contents when leaving the page
+        self.waveforms.clear()
+        return Return.Code.CMD_FINISHED
+
+    def _vis(self, params: str) -> Return.Code:
+        target, state = params.split(",")
+        component = self._component(target)
+        if component is None and target.isdigit():
+            component = self.current_page.components_by_cid.get(int(target))
+        if component is None:
+            return Return.Code.INVALID_COMPONENT_ID
+        component.attributes["vis"] = int(state)
+        return Return.Code.CMD_FINISHED
+
+    # ~Instructions -----------------------------------------------------------
+
+    # Events ------------------------------------------------------------------
+    def touch(self, name_or_cid: typing.Union[str, int], pressed: bool = True):
+        """ Inject a touch event for a component of the current page, sent as soon as the line is free """
+        with self._lock:
+            if isinstance(name_or_cid, str):
+                cid = self.current_page.components[name_or_cid].cid
+            else:
+                cid = name_or_cid
+            self._send(struct.pack("<BBBB", Return.Code.EVENT_TOUCH_HEAD.value, self.current_page.pid, cid,
+                                   1 if pressed else 0) + S_END_OF_CMD, self.clock())
+
+    # ~Events -----------------------------------------------------------------
+
+
+class SimulatedPort(object):
+    """ The subset of the serial.Serial interface used by AbstractSerialNex, connected to a NexSimulator """
+
+    def __init__(self, simulator: NexSimulator, baudrate: int):
+        self.simulator = simulator
+        self.baudrate = baudrate
+
+    @property
+    def in_waiting(self) -> int:
+        return self.simulator.in_waiting(self.baudrate)
+
+    def write(self, data: bytes) -> int:
+        self.simulator.receive(bytes(data), self.baudrate)
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        return self.simulator.read(size, self.baudrate)
+
+    def read_all(self) -> bytes:
+        return self.read(self.in_waiting)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self.simulator.reset_output()
+
+    def reset_output_buffer(self):
+        pass
+
+    def fileno(self) -> int:
+        raise io.UnsupportedOperation("The simulator has no file descriptor")
+
+    def close(self):
+        pass
+
+
+class SimulatedNex(AbstractSerialNex):
+    """ Transport connected to a NexSimulator instead of a serial port, e.g.
+
+        >>> simulator = NexSimulator(baudrate=115200)
+        >>> simulator.add_page("page0", 0)
+        >>> simulator.add_component(0, "n0", 1, val=0)
+        >>> device = NexDevice(SimulatedNex(simulator))
+    """
+
+    def __init__(self, simulator: NexSimulator, baudrate: int = None):
+        super().__init__()
+        self.simulator = simulator
+        self.sp = SimulatedPort(simulator, simulator.baudrate if baudrate is None else baudrate)
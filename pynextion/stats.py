@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import typing
+
+__all__ = ['Histogram', 'DeviceStats']
+
+
+class Histogram(object):
+    """ Distribution of non negative values in logarithmic (power of two) buckets: bucket 0 counts values below
+        `resolution`, bucket i counts values in [resolution * 2 ** (i - 1), resolution * 2 ** i).
+        Constant memory and O(1) add(), percentiles are approximated by the bucket upper bound.
+    """
+    __slots__ = ('resolution', 'counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, resolution: float = 1e-6, buckets: int = 32):
+        """
+        :param resolution: Upper bound of the first bucket, e.g. 1e-6 for durations in seconds
+        :param buckets: Number of buckets, the last one also counts larger values
+        """
+        self.resolution = resolution
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[min(int(value / self.resolution).bit_length(), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> typing.Union[float, None]:
+        return self.total / self.count if self.count else None
+
+    def upper_bound(self, index: int) -> float:
+        return self.resolution * (1 << index)
+
+    def percentile(self, percent: float) -> typing.Union[float, None]:
+        """ Upper bound of the bucket holding the given percentile, capped to the maximum value seen """
+        if not self.count:
+            return None
+        threshold = self.count * percent / 100.0
+        seen = 0
+        last = len(self.counts) - 1
+        for index, count in enumerate(self.counts[:last]):
+            seen += count
+            if seen >= threshold:
+                return min(self.upper_bound(index), self.max)
+        # The last bucket has no upper bound
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": {self.upper_bound(index): count for index, count in enumerate(self.counts) if count},
+        }
+
+
+class CommandStats(object):
+    """ Timings [s] of a command type: time waiting in the queue, time waiting for the response and total """
+    __slots__ = ('successful', 'failed', 'queued', 'response', 'total')
+
+    def __init__(self):
+        self.successful = 0
+        self.failed = 0
+        self.queued = Histogram()
+        self.response = Histogram()
+        self.total = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "successful": self.successful,
+            "failed": self.failed,
+            "queued": self.queued.snapshot(),
+            "response": self.response.snapshot(),
+            "total": self.total.snapshot(),
+        }
+
+
+class DeviceStats(object):
+    """ Counters collected by a NexDevice, see NexDevice.stats() """
+
+    def __init__(self, clock: typing.Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.started = self.clock()
+        self.commands = {}  # type: typing.Dict[str, CommandStats]
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.queue_depths = Histogram(resolution=1, buckets=16)
+        self.bytes_written = 0
+        self.frames_written = 0
+        self.bytes_read = 0
+        self.frames_read = 0
+
+    def command_enqueued(self, depth: int):
+        """ Sample the queue depth, after a command has been enqueued """
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        self.queue_depths.add(depth)
+
+    def command_completed(self, name: str, successful: bool, enqueued_at: typing.Union[float, None],
+                          sent_at: float, completed_at: float, depth: int):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        if successful:
+            stats.successful += 1
+        else:
+            stats.failed += 1
+        stats.response.add(completed_at - sent_at)
+        if enqueued_at is not None:
+            stats.queued.add(sent_at - enqueued_at)
+            stats.total.add(completed_at - enqueued_at)
+        self.queue_depth = depth
+
+    def written(self, nbytes: int, nframes: int):
+        self.bytes_written += nbytes
+        self.frames_written += nframes
+
+    def read(self, nbytes: int):
+        self.bytes_read += nbytes
+        self.frames_read += 1
+
+    def snapshot(self) -> dict:
+        elapsed = self.clock() - self.started
+        rate = 1.0 / elapsed if elapsed > 0 else 0.0
+        return {
+            "elapsed": elapsed,
+            "commands": {name: stats.snapshot() for name, stats in self.commands.items()},
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "queue_depths": self.queue_depths.snapshot(),
+            "written": {
+                "bytes": self.bytes_written,
+                "frames": self.frames_written,
+                "bytes_per_sec": self.bytes_written * rate,
+                "frames_per_sec": self.frames_written * rate,
+            },
+            "read": {
+                "bytes": self.bytes_read,
+                "frames": self.frames_read,
+                "bytes_per_sec": self.bytes_read * rate,
+                "frames_per_sec": self.frames_read * rate,
+            },
+        }
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import typing
+
+from enum import Enum
+
+from .commands import AddtCommand, Completable
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+__all__ = ['Decimator', 'WaveformHistory', 'WaveformStreamer', 'to_samples']
+
+
+def to_samples(values) -> bytes:
+    """ Convert waveform values (a NumPy array, bytes or any iterable of numbers) to 1 byte samples, clipping them
+        to the 0-255 range of the display
+    """
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        return bytes(values)
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype == numpy.uint8:
+            return values.tobytes()
+        return numpy.clip(values, 0, 255).astype(numpy.uint8).tobytes()
+    return bytes(min(max(int(value), 0), 255) for value in values)
+
+
+class Decimator(object):
+    """ Reduce high rate samples to the display rate, one output sample every `factor` input samples, e.g.
+
+        >>> decimator = Decimator.for_rates(1000, 50)
+        >>> streamer.feed(waveform.channels[0], decimator(readings))
+
+        Input which does not fill a whole block is kept for the next call, so the output does not depend on how the
+        input is split. Modes:
+        - ENVELOPE: minimum and maximum of every 2 * factor samples, in the order they came in, so spikes are kept
+        - MEAN: average of every `factor` samples
+        - LAST: last of every `factor` samples
+        Requires NumPy.
+    """
+
+    class Mode(Enum):
+        ENVELOPE = 0
+        MEAN = 1
+        LAST = 2
+
+    def __init__(self, factor: int, mode: 'Decimator.Mode' = Mode.ENVELOPE):
+        if numpy is None:
+            raise ImportError("Decimator requires NumPy")
+        if factor < 1:
+            raise ValueError("factor must be at least 1")
+        self.factor = factor
+        self.mode = mode
+        self._pending = numpy.empty(0)
+
+    @classmethod
+    def for_rates(cls, input_rate: float, output_rate: float, mode: 'Decimator.Mode' = Mode.ENVELOPE) -> 'Decimator':
+        """ Decimator from input_rate to (about) output_rate [samples/s] """
+        return cls(max(int(round(input_rate / output_rate)), 1), mode)
+
+    @property
+    def block_size(self) -> int:
+        """ Number of input samples reduced together """
+        return 2 * self.factor if self.mode is self.Mode.ENVELOPE else self.factor
+
+    @property
+    def pending(self) -> int:
+        """ Number of input samples waiting for a block to be completed """
+        return len(self._pending)
+
+    def reset(self):
+        self._pending = numpy.empty(0)
+
+    def __call__(self, values) -> 'numpy.ndarray':
+        """ Feed samples (a NumPy array or any iterable of numbers), return the reduced ones """
+        values = numpy.asarray(values)
+        if len(self._pending):
+            values = numpy.concatenate((self._pending, values))
+        block_size = self.block_size
+        count = len(values) // block_size
+        self._pending = values[count * block_size:].copy()
+        blocks = values[:count * block_size].reshape(count, block_size)
+
+        if self.mode is self.Mode.LAST:
+            return blocks[:, -1]
+        if self.mode is self.Mode.MEAN:
+            return blocks.mean(axis=1)
+
+        rows = numpy.arange(count)
+        lowest = blocks.argmin(axis=1)
+        highest = blocks.argmax(axis=1)
+        minimum = blocks[rows, lowest]
+        maximum = blocks[rows, highest]
+        min_first = lowest <= highest
+        reduced = numpy.empty(2 * count, dtype=values.dtype)
+        reduced[0::2] = numpy.where(min_first, minimum, maximum)
+        reduced[1::2] = numpy.where(min_first, maximum, minimum)
+        return reduced
+
+
+class WaveformHistory(object):
+    """ The last `capacity` samples sent to a waveform channel, in a fixed size ring buffer """
+    __slots__ = ('_buffer', '_end', '_size')
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._buffer = bytearray(capacity)
+        # Index after the newest sample
+        self._end = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def clear(self):
+        self._end = self._size = 0
+
+    def extend(self, samples: bytes):
+        capacity = len(self._buffer)
+        count = len(samples)
+        if count >= capacity:
+            self._buffer[:] = samples[count - capacity:]
+            self._end = 0
+            self._size = capacity
+            return
+        end = self._end + count
+        if end <= capacity:
+            self._buffer[self._end:end] = samples
+        else:
+            split = capacity - self._end
+            self._buffer[self._end:] = samples[:split]
+            self._buffer[:count - split] = samples[split:]
+        self._end = end % capacity
+        self._size = min(self._size + count, capacity)
+
+    def samples(self) -> bytes:
+        """ All the samples, oldest first """
+        start = self._end - self._size
+        if start >= 0:
+            return bytes(self._buffer[start:self._end])
+        return bytes(self._buffer[start:] + self._buffer[:self._end])
+
+    def downsample(self, count: int) -> bytes:
+        """ At most `count` samples evenly spread over the whole history, the newest one included """
+        samples = self.samples()
+        size = len(samples)
+        if size <= count:
+            return samples
+        return bytes(samples[(index + 1) * size // count - 1] for index in range(count))
+
+
+class StreamEntry(object):
+    """ Samples waiting to be sent to a waveform channel """
+    __slots__ = ('channel', 'buffer', 'credit', 'pending')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.buffer = bytearray()
+        # Samples which may be sent now without exceeding the rate
+        self.credit = 0.0
+        self.pending = None  # type: typing.Union[Completable, None]
+
+    @property
+    def busy(self) -> bool:
+        return self.pending is not None and not self.pending.completed
+
+
+class WaveformStreamer(object):
+    """ Feed several waveform channels (widgets.NexWaveformChannel) at a target sample rate.
+
+        >>> streamer = WaveformStreamer(rate=100)
+        >>> streamer.feed(waveform.channels[0], samples)  # any time, e.g. when a sensor reading comes in
+        >>> streamer.update()  # periodically, e.g. from a QTimer, see next_update_delay()
+
+        Samples are buffered per channel and sent with addt (AddtCommand) through the NexDevice command queue,
+        as many as the rate allows since the previous update, in chunks of at most max_chunk samples.
+        A channel gets a new chunk only once the previous one has been acknowledged, so a slow link delays the
+        samples instead of flooding the queue. When more than max_backlog samples are waiting the oldest are dropped.
+    """
+
+    def __init__(self, rate: float, max_chunk: int = AddtCommand.MAX_SIZE, max_backlog: int = None,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        """
+        :param rate: Samples per second sent to each channel
+        :param max_chunk: Maximum number of samples of a single addt
+        :param max_backlog: Maximum number of samples waiting to be sent on each channel, by default 4 * max_chunk
+        :param clock: Monotonic time source
+        """
+        if not 0 < max_chunk <= AddtCommand.MAX_SIZE:
+            raise ValueError("max_chunk must be in 1-{} range".format(AddtCommand.MAX_SIZE))
+        self.rate = rate
+        self.max_chunk = max_chunk
+        self.max_backlog = max_backlog if max_backlog is not None else 4 * max_chunk
+        self.clock = clock
+        self._entries = []  # type: typing.List[StreamEntry]
+        self._updated_at = None
+
+    def _entry(self, channel) -> StreamEntry:
+        for entry in self._entries:
+            if entry.channel is channel:
+                return entry
+        entry = StreamEntry(channel)
+        self._entries.append(entry)
+        return entry
+
+    def feed(self, channel, values):
+        """ Queue samples for a channel, see to_samples() """
+        entry = self._entry(channel)
+        entry.buffer += to_samples(values)
+        overflow = len(entry.buffer) - self.max_backlog
+        if overflow > 0:
+            del entry.buffer[:overflow]
+
+    def backlog(self, channel) -> int:
+        """ Number of samples waiting to be sent to a channel """
+        return len(self._entry(channel).buffer)
+
+    def update(self) -> typing.List[Completable]:
+        """ Send the samples due, return the commands enqueued """
+        now = self.clock()
+        elapsed = now - self._updated_at if self._updated_at is not None else 0.0
+        self._updated_at = now
+        commands = []
+        for entry in self._entries:
+            # Unused credit is kept for a single chunk at most, not to burst after the buffer has been empty
+            entry.credit = min(entry.credit + elapsed * self.rate, float(self.max_chunk))
+            size = min(int(entry.credit), len(entry.buffer))
+            if entry.busy or not size:
+                continue
+            entry.credit -= size
+            chunk = bytes(entry.buffer[:size])
+            del entry.buffer[:size]
+            entry.pending = entry.channel.append(chunk)
+            commands.append(entry.pending)
+        return commands
+
+    def next_update_delay(self) -> typing.Union[float, None]:
+        """ Time [s] before update() has something to send, None if no samples are waiting or they all wait for the
+            acknowledgement of the previous chunk
+        """
+        delay = None
+        for entry in self._entries:
+            if entry.buffer and not entry.busy:
+                wait = max((1.0 - entry.credit) / self.rate, 0.0)
+                delay = wait if delay is None else min(delay, wait)
+        return delay
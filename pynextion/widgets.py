@@ -3,17 +3,19 @@
 
 import collections
 import logging
+import numbers
 import typing
 
 from collections import ChainMap, OrderedDict
 
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 
-from .commands import CommandBase, PageCommand
+from .commands import AddtCommand, Command, CommandBase, CommandGroup, Completable, PageCommand
 from .exceptions import NexComponentNameException, NexComponentIdException
 
 from .interfaces import NxInterface, IViewable, IBooleanValued, INumericalUnsignedValued, INumericalSignedValued, \
     IStringValued, IFontStyleable, IColourable, IPicturable, ITouchable, IWidthable, IHeightable
+from .waveform import WaveformHistory, to_samples
 
 
 class NexWidget(QObject):
@@ -34,32 +36,36 @@ class NexWidget(QObject):
         self.name = name
         self.pid = pid  # Page ID
         self.cid = cid  # Component (widget) ID
+        # The NexDevice the widget is hooked to, set by NexDevice.hook_page and NexPage.hook_widget
+        self.device = None
         self._properties_cache = {}  # type: typing.Dict[str, typing.Any]
+        # Reusable commands to refresh properties, see NxInterface._refresh_internal
+        self._refresh_commands = {}  # type: typing.Dict[str, CommandBase]
+        # Last one-off read of each property, see NxInterface.get
+        self._pending_gets = {}  # type: typing.Dict[str, CommandBase]
+        # Property changes not acknowledged yet, see NxInterface._set_property
+        self._pending_sets = {}  # type: typing.Dict[str, CommandBase]
         self.commands = collections.deque()  # type: typing.Sequence[CommandBase]
 
     def __str__(self) -> str:
         return "{0.__class__.__name__} - Page ID {0.pid} - Component ID {0.cid} - Name {0.name}".format(self)
 
-    @pyqtSlot()
-    def _on_command_successful(self):
+    def _on_command_successful(self, command: CommandBase):
         """ Dequeue command and disconnect handlers """
-        command = self.sender()
-        command.successful.disconnect()
-        command.failed.disconnect()
-        existing = self.commands.pop()
-        assert existing == command
+        self._release_command(command)
 
-    @pyqtSlot()
-    def _on_command_failed(self):
+    def _on_command_failed(self, command: CommandBase):
         """ Dequeue command and disconnect handlers. Relay command to command_failed signal. """
-        command = self.sender()
         self.command_failed.emit(command)
-        command.successful.disconnect()
-        command.failed.disconnect()
-        existing = self.commands.pop()
-        assert existing == command
+        self._release_command(command)
         self._logger.error("Command %s failed on object %s with data event %s: {}", command, self, command.data_event)
 
+    def _release_command(self, command: CommandBase):
+        command.successful.disconnect(self._on_command_successful)
+        command.failed.disconnect(self._on_command_failed)
+        existing = self.commands.pop()
+        assert existing is command
+
     def send_command(self, command: CommandBase):
         """ Enqueue a command to be executed """
         self.commands.appendleft(command)
@@ -67,6 +73,12 @@ class NexWidget(QObject):
         command.successful.connect(self._on_command_successful)
         self.enqueue_command.emit(command)
 
+    def page_shown(self):
+        """ Called when the page of the widget is brought to foreground, to restore what the device does not keep.
+            To be reimplemented in subclasses.
+        """
+        pass
+
     def to_dict(self):
         return {
             "pid": self.pid,
@@ -117,6 +129,11 @@ class NexPage(NexWidget):
     def widgets(self):
         return self.D_WIDGETS_BY_NAME.values()
 
+    @property
+    def page_switch_in_progress(self) -> bool:
+        """ True from show() until the device acknowledges the page change """
+        return self._page_switch_in_progress
+
     def widget(self, name_or_id: typing.Union[str, int]):
         """ Access a widget by either name or ID"""
         return self._widgets_by_name_or_id[name_or_id]
@@ -134,6 +151,22 @@ class NexPage(NexWidget):
         if not self._page_switch_in_progress:
             [widget.onetime_refresh() for widget in self.widgets]
 
+    def fetch(self, names: typing.Iterable[str]) -> 'PropertiesFetch':
+        """ Read several properties at once.
+            :param names: iterable of "<widget name>.<property>", e.g. ["n0.val", "n1.val", "t0.txt"]
+            :returns: a PropertiesFetch, completed when all values have been read into the widgets properties cache.
+                Its result is a dict "<widget name>.<property>" -> value, as decoded by the widget.
+
+            All the gets are enqueued back to back so, if NexDevice.max_in_flight allows it, they are pipelined
+            and coalesced into a single write: the whole fetch costs about one round-trip.
+        """
+        names = list(names)
+        targets = []
+        for name in names:
+            widget_name, property_name = name.split(".", 1)
+            targets.append((self.widget(widget_name), property_name))
+        return PropertiesFetch(names, targets, [widget.get(property_name) for widget, property_name in targets])
+
     def show(self):
         """ Bring the current page to foreground.
             **DO NOT** call this method directly, use select_page() on parent NexDevice instead
@@ -142,6 +175,12 @@ class NexPage(NexWidget):
         self._page_switch_in_progress = True
         target = self.name if self.pid is None else self.pid
         self.send_command(PageCommand(target))
+        self.page_shown()
+
+    def page_shown(self):
+        """ Let the widgets restore their contents, their commands are queued after the page change """
+        for widget in self.widgets:
+            widget.page_shown()
 
     def hook_widget(self, widget_type: str, name: str, cid=None) -> NexWidget:
         """ Hook and return a new widget of the specified type/name/ID to the current page """
@@ -157,6 +196,7 @@ class NexPage(NexWidget):
         self.D_WIDGETS_BY_NAME[name] = widget
         if cid is not None:
             self.D_WIDGETS_BY_CID[cid] = widget
+        widget.device = self.device
         widget.enqueue_command.connect(self.enqueue_command)
         self._logger.debug("Hooked new widget %s", name)
         return widget
@@ -167,13 +207,8 @@ class NexPage(NexWidget):
         """
         return [self.hook_widget(widget_type, name, cid) for widget_type, name, cid in widget_data]
 
-    @pyqtSlot()
-    def _on_command_successful(self):
-        command = self.sender()
-        command.successful.disconnect()
-        command.failed.disconnect()
-        existing = self.commands.pop()
-        assert existing == command
+    def _on_command_successful(self, command: CommandBase):
+        self._release_command(command)
         if isinstance(command, PageCommand):
             self._page_switch_in_progress = False
 
@@ -185,6 +220,22 @@ class NexPage(NexWidget):
         }
 
 
+class PropertiesFetch(CommandGroup):
+    """ Completion of NexPage.fetch() """
+    __slots__ = ('names', 'targets')
+
+    def __init__(self, names: typing.List[str], targets: typing.List[typing.Tuple[NexWidget, str]],
+                 commands: typing.Iterable[CommandBase]):
+        super().__init__(commands)
+        self.names = names
+        self.targets = targets
+
+    @property
+    def result(self) -> typing.Dict[str, typing.Any]:
+        return {name: widget._properties_cache.get(property_name)
+                for name, (widget, property_name) in zip(self.names, self.targets)}
+
+
 class NexPicture(NexWidget, IViewable, IPicturable):
     pass
 
@@ -229,36 +280,70 @@ class NexText(NexWidget, IViewable, IStringValued, IFontStyleable, IColourable,
     ONETIME_REFRESH_VARIABLES = ("txt",)
 
 
-class NexWaveformChannel:
-    def __init__(self, nid, chid):
-        self._nid = nid
-        self._chid = chid  # channel id
-
-    def append(self, value):
-        nid = self._nid
-        cid = nid.cid
-        chid = self._chid
-        nexserial = nid._nexserial
-        if isinstance(value, list):
-            vals = value
-            n = len(vals)
-            cmd = "addt %s,%s,%s" % (cid, chid, n)
-            nexserial.send(cmd)
-            nexserial.sp.write(bytearray(vals))
-            return nexserial.read_all()
+class NexWaveformChannel(object):
+    """ A channel of a NexWaveform, see waveform.WaveformStreamer to feed it at a given sample rate.
+        The samples appended are kept in `history` (if not None) and sent again when the page is shown.
+    """
+    __slots__ = ('waveform', 'chid', 'history')
+
+    def __init__(self, waveform: 'NexWaveform', chid: int, history_size: int = 0):
+        self.waveform = waveform
+        self.chid = chid  # channel id
+        self.history = WaveformHistory(history_size) if history_size else None
+
+    def __repr__(self):
+        return "NexWaveformChannel({0.waveform.name}, {0.chid})".format(self)
+
+    def append(self, value) -> Completable:
+        """ Append a value (add) or several values (addt, in as many transfers as needed) to the channel.
+            Values are clipped to 0-255, see waveform.to_samples() for the accepted types.
+        """
+        waveform = self.waveform
+        if isinstance(value, numbers.Number):
+            sample = min(max(int(value), 0), 255)
+            if self.history is not None:
+                self.history.extend(bytes((sample, )))
+            command = Command("add", waveform.cid, self.chid, sample)
+            waveform.send_command(command)
+            return command
+        samples = to_samples(value)
+        if self.history is not None:
+            self.history.extend(samples)
+        size = AddtCommand.MAX_SIZE
+        commands = [AddtCommand(waveform.cid, self.chid, samples[start:start + size])
+                    for start in range(0, len(samples), size)]
+        for command in commands:
+            waveform.send_command(command)
+        return commands[0] if len(commands) == 1 else CommandGroup(commands)
+
+    def replay(self) -> typing.Union[AddtCommand, None]:
+        """ Send the history again in a single transfer, downsampled to the waveform columns """
+        if not self.history:
+            return None
+        columns = self.waveform.columns
+        if columns:
+            samples = self.history.downsample(min(columns, AddtCommand.MAX_SIZE))
         else:
-            if value < 0 or value > 255:
-                raise (Exception("value must be in 0-255 range"))
-            cmd = "add %s,%s,%s" % (cid, chid, value)
-            return nexserial.send(cmd)
+            samples = self.history.samples()[-AddtCommand.MAX_SIZE:]
+        command = AddtCommand(self.waveform.cid, self.chid, samples)
+        self.waveform.send_command(command)
+        return command
 
 
-class NexWaveformChannels:
-    def __init__(self, nid):
-        self._nid = nid
+class NexWaveformChannels(object):
+    __slots__ = ('_channels', )
+
+    def __init__(self, waveform: 'NexWaveform', history_size: int = 0):
+        self._channels = tuple(NexWaveformChannel(waveform, chid, history_size) for chid in range(waveform.CHANNELS))
+
+    def __getitem__(self, chid: int) -> NexWaveformChannel:
+        return self._channels[chid]
 
-    def __getitem__(self, id):
-        return NexWaveformChannel(self._nid, id)
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __iter__(self):
+        return iter(self._channels)
 
 
 class NexWaveformGrid(NexWidget, NxInterface):
@@ -291,13 +376,34 @@ class NexWaveformGrid(NexWidget, NxInterface):
 
 
 class NexWaveform(NexWidget, IViewable, IColourable, ITouchable):
+    CHANNELS = 4
+    " Maximum number of channels of a waveform "
+    HISTORY_SIZE = 1024
+    " Default number of samples kept by each channel to restore the trace when the page is shown, 0 for none "
+
+    def __init__(self, name: str, pid: int, cid: int = None, parent=None, history_size: int = None,
+                 columns: int = None):
+        """
+        :param history_size: Number of samples kept by each channel, by default HISTORY_SIZE
+        :param columns: Width [px] of the waveform, the history sent when the page is shown is downsampled to it.
+            If None at most AddtCommand.MAX_SIZE of the latest samples are sent.
+        """
+        super().__init__(name, pid, cid, parent)
+        self.columns = columns
+        self._channels = NexWaveformChannels(self, self.HISTORY_SIZE if history_size is None else history_size)
+
+    def page_shown(self):
+        """ The device clears the waveform when leaving the page: send the channels history again """
+        for channel in self._channels:
+            channel.replay()
+
     @property
     def grid(self):
         return NexWaveformGrid(self._nid)
 
     @property
-    def channels(self):
-        return NexWaveformChannels(self._nid)
+    def channels(self) -> NexWaveformChannels:
+        return self._channels
 
 
 class WidgetFactory:
@@ -35,4 +35,5 @@ setup(
         'Programming Language :: Python :: 3.7',
     ],
     install_requires=['pyserial'],
+    extras_require={'numpy': ['numpy']},
 )
@@ -0,0 +1,50 @@
+import pytest
+
+from pynextion.device import NexDevice
+from pynextion.simulator import NexSimulator, SimulatedNex
+
+
+class FakeClock(object):
+    """ Monotonic time source moved by hand """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _drain(device):
+    """ Poll until the commands queue is empty """
+    while not device.poll():
+        pass
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def drain():
+    return _drain
+
+
+@pytest.fixture
+def simulated_device():
+    """ (NexSimulator, initialized NexDevice) with two pages: page0 with a number, a text, a button and a waveform,
+        and an empty page1
+    """
+    simulator = NexSimulator(baudrate=115200, timed=False)
+    simulator.add_page("page0", 0)
+    simulator.add_page("page1", 1)
+    simulator.add_component(0, "n0", 1, val=42)
+    simulator.add_component(0, "t0", 2, txt="hello")
+    simulator.add_component(0, "b0", 3, txt="OK")
+    simulator.add_component(0, "s0", 4)
+    device = NexDevice(SimulatedNex(simulator), max_in_flight=4)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widgets((("number", "n0", 1), ("text", "t0", 2), ("button", "b0", 3), ("waveform", "s0", 4)))
+    device.hook_page("page1", pid=1)
+    device.init()
+    return simulator, device
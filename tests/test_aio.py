@@ -0,0 +1,94 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from pynextion.aio import AsyncNexDevice
+from pynextion.commands import Command
+from pynextion.events import COMMAND_SUCCEEDED
+from pynextion.exceptions import NexCommandException
+from pynextion.hardware import PySerialNex
+
+
+@pytest.fixture
+def pty_transport():
+    master, slave = os.openpty()
+    transport = PySerialNex(os.ttyname(slave), baudrate=115200, timeout=0)
+    yield master, transport
+    transport.close()
+    os.close(slave)
+    os.close(master)
+
+
+def _answer(master, expected, response):
+    """ Read a command on the display side and answer it """
+    data = b''
+    while not data.endswith(b'\xff\xff\xff'):
+        data += os.read(master, 1024)
+    assert data == expected
+    os.write(master, response)
+
+
+def test_await_get(pty_transport):
+    master, transport = pty_transport
+    device = AsyncNexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widget("number", "n0", 1)
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        async with device:
+            command = page["n0"].get("val")
+            await loop.run_in_executor(None, _answer, master, b'get n0.val\xff\xff\xff',
+                                       b'\x71\xfe\xff\xff\xff\xff\xff\xff\x01\xff\xff\xff')
+            value = await asyncio.wait_for(command, 5)
+        return value
+
+    assert asyncio.run(main()) == -2
+    assert page["n0"]._properties_cache["val"] == -2
+
+
+def test_await_failed(pty_transport):
+    master, transport = pty_transport
+    device = AsyncNexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widget("number", "n0", 1)
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        async with device:
+            command = page["n0"].get("nosuch")
+            # Invalid variable
+            await loop.run_in_executor(None, _answer, master, b'get n0.nosuch\xff\xff\xff', b'\x1a\xff\xff\xff')
+            await asyncio.wait_for(command, 5)
+
+    with pytest.raises(NexCommandException):
+        asyncio.run(main())
+
+
+def test_await_completed_in_another_thread():
+    command = Command("cmd")
+
+    async def main():
+        # As the poller thread would do
+        completer = threading.Timer(0.05, command.event, (COMMAND_SUCCEEDED,))
+        completer.start()
+        started = time.monotonic()
+        await asyncio.wait_for(command, 5)
+        completer.join()
+        return time.monotonic() - started
+
+    # The loop is woken up, not left waiting for the timeout
+    assert asyncio.run(main()) < 1
+
+    # Completed after the awaiting loop has been closed
+    command = Command("cmd")
+
+    async def abandon():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(command, 0.01)
+
+    asyncio.run(abandon())
+    assert command.event(COMMAND_SUCCEEDED)
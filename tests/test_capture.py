@@ -0,0 +1,65 @@
+import io
+
+from pynextion.capture import READ, WRITTEN, RecordingNex, ReplayNex, read_capture
+from pynextion.device import NexDevice
+from pynextion.simulator import NexSimulator, SimulatedNex
+
+
+def _record():
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "n0", 1, val=5)
+    capture = io.BytesIO()
+    now = [0.0]
+    transport = RecordingNex(SimulatedNex(simulator), capture, clock=lambda: now[0])
+    device = NexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widget("number", "n0", 1)
+    device.init()
+    now[0] = 1.0
+    command = page["n0"].get("val")
+    while not device.poll():
+        pass
+    assert command.result == 5
+    transport.writer.flush()
+    capture.seek(0)
+    return capture
+
+
+def test_record():
+    records = list(read_capture(_record()))
+    assert records[0][1] == WRITTEN
+    assert b''.join(data for _, direction, data in records if direction == WRITTEN).endswith(
+        b'get n0.val\xff\xff\xff')
+    assert (1.0, READ, b'\x71\x05\x00\x00\x00\xff\xff\xff\x01\xff\xff\xff') in records
+
+
+def _replay(capture, speed, clock):
+    transport = ReplayNex(capture, speed=speed, clock=clock)
+    device = NexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widget("number", "n0", 1)
+    device.init()
+    command = page["n0"].get("val")
+    return transport, device, command
+
+
+def test_replay_lockstep():
+    transport, device, command = _replay(_record(), None, lambda: 0.0)
+    while not device.poll():
+        pass
+    assert command.result == 5
+    assert transport.finished
+    assert transport.sp.written == transport.sp.expected
+
+
+def test_replay_timed():
+    now = [0.0]
+    transport, device, command = _replay(_record(), 2.0, lambda: now[0])
+    device.poll()
+    device.poll()
+    # Recorded after 1 second, replayed twice as fast
+    assert not command.completed
+    now[0] = 0.5
+    device.poll()
+    assert command.result == 5
@@ -0,0 +1,108 @@
+from pynextion.commands import Callbacks, CommandGroup, GetPropertyCommand, SetPropertyCommand
+from pynextion.constants import Return
+from pynextion.events import CommandSucceeded, EventLaunched, NumberHeadEvent
+from pynextion.qt import QtCommandAdapter
+from pynextion.widgets import NexCheckbox, NexNumber
+
+
+def test_callbacks():
+    calls = []
+    callbacks = Callbacks()
+
+    def once(arg):
+        calls.append(arg)
+        callbacks.disconnect(once)
+
+    callbacks.connect(once)
+    callbacks.connect(calls.append)
+    callbacks.emit(1)
+    callbacks.emit(2)
+    assert calls == [1, 1, 2]
+    assert len(callbacks) == 1
+    callbacks.disconnect()
+    assert len(callbacks) == 0
+
+
+def test_command_slots():
+    command = SetPropertyCommand("n0", "val", 3)
+    assert not hasattr(command, '__dict__')
+    assert command.command == b'n0.val=3\xff\xff\xff'
+
+
+def test_get_command_callbacks():
+    successful = []
+    command = GetPropertyCommand("n0", "val", on_successful=successful.append)
+    assert not command.event(NumberHeadEvent(Return.Code.NUMBER_HEAD, 3, 3))
+    assert command.event(CommandSucceeded())
+    assert successful == [command]
+    assert command.result == 3
+
+
+def test_qt_adapter():
+    emitted = []
+    command = GetPropertyCommand("n0", "val")
+    adapter = QtCommandAdapter(command)
+    adapter.successful.connect(emitted.append)
+    command.event(CommandSucceeded())
+    assert emitted == [command]
+    adapter.detach(command)
+    assert len(command.successful) == 0
+
+
+def test_widget_handlers():
+    widget = NexNumber("n0", 0, 1)
+    command = widget.get("val")
+    assert list(widget.commands) == [command]
+    command.event(NumberHeadEvent(Return.Code.NUMBER_HEAD, 0xfffffffe, -2))
+    command.event(CommandSucceeded())
+    assert widget._properties_cache["val"] == -2
+    # Decoded like the cache
+    assert command.result == -2
+    assert not widget.commands
+    # Only the property handler is left
+    assert len(command.successful) == 1
+
+    widget = NexCheckbox("c0", 0, 2)
+    command = widget.get("val")
+    command.event(NumberHeadEvent(Return.Code.NUMBER_HEAD, 1, 1))
+    command.event(CommandSucceeded())
+    assert command.result is True and widget._properties_cache["val"] is True
+
+
+def test_refresh_commands_reused():
+    widget = NexNumber("n0", 0, 1)
+    widget.REFRESH_VARIABLES = ("val",)
+    enqueued = []
+    widget.enqueue_command.connect(enqueued.append)
+    widget.refresh()
+    widget.refresh()
+    # Not enqueued again while pending
+    assert len(enqueued) == 1
+    command = enqueued[0]
+    command.mark_sent()
+    widget.refresh()
+    assert len(enqueued) == 1
+
+    command.event(NumberHeadEvent(Return.Code.NUMBER_HEAD, 5, 5))
+    command.event(CommandSucceeded())
+    assert widget._properties_cache["val"] == 5
+    widget.refresh()
+    assert len(enqueued) == 2
+    # Same preformatted command, reset
+    assert enqueued[1] is command
+    assert command.status == command.Status.CREATED
+    assert command.data_event is None
+    assert len(command.successful) == 2
+
+
+def test_command_group():
+    commands = [GetPropertyCommand("n0", "val"), GetPropertyCommand("n1", "val")]
+    failed = []
+    group = CommandGroup(commands, on_failed=failed.append)
+    commands[0].event(CommandSucceeded())
+    assert not group.completed
+    commands[1].event(EventLaunched())
+    assert group.status == group.Status.ERROR
+    assert failed == [group]
+
+    assert CommandGroup([]).status == CommandGroup.Status.SUCCESSFUL
@@ -0,0 +1,559 @@
+import collections
+import os
+import threading
+import time
+
+import pytest
+
+from pynextion.commands import Command, CommandBase, CommandBatch
+from pynextion.device import NexDevice, NexEventPoller
+from pynextion.exceptions import NexBaudrateException
+from pynextion.hardware import PySerialNex
+from pynextion.simulator import NexSimulator, SimulatedNex
+
+ACK = b'\x01\xff\xff\xff'
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.written = []
+        self.incoming = collections.deque()
+
+    def write(self, data):
+        self.written.append(bytes(data))
+        return len(data)
+
+    def read_next(self):
+        return self.incoming.popleft() if self.incoming else b''
+
+    def read_all(self):
+        return b''
+
+
+def test_poll_one_at_a_time():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    commands = [Command("cmd%d" % i) for i in range(3)]
+    for command in commands:
+        device._on_enqueue_command(command)
+
+    device.poll()
+    assert transport.written == [b'cmd0\xff\xff\xff']
+    device.poll()
+    assert len(transport.written) == 1
+
+    transport.incoming.append(ACK)
+    device.poll()
+    assert commands[0].status == CommandBase.Status.SUCCESSFUL
+    assert transport.written[-1] == b'cmd1\xff\xff\xff'
+
+
+def test_poll_pipelined():
+    transport = FakeTransport()
+    device = NexDevice(transport, max_in_flight=3)
+    commands = [Command("cmd%d" % i) for i in range(5)]
+    for command in commands:
+        device._on_enqueue_command(command)
+
+    device.poll()
+    # Coalesced in a single write
+    assert transport.written == [b'cmd0\xff\xff\xffcmd1\xff\xff\xffcmd2\xff\xff\xff']
+
+    # Responses are matched in FIFO order
+    transport.incoming.extend((ACK, ACK))
+    device.poll()
+    assert [command.status for command in commands] == [CommandBase.Status.SUCCESSFUL] * 2 + \
+        [CommandBase.Status.SENT] * 3
+    assert transport.written[-1] == b'cmd3\xff\xff\xffcmd4\xff\xff\xff'
+
+    transport.incoming.extend((ACK, ACK, ACK))
+    assert device.poll()
+    assert all(command.status == CommandBase.Status.SUCCESSFUL for command in commands)
+
+
+def test_poll_pipelined_byte_limit():
+    transport = FakeTransport()
+    # Each command is 7 bytes long
+    device = NexDevice(transport, max_in_flight=10, max_in_flight_bytes=16)
+    for i in range(5):
+        device._on_enqueue_command(Command("cmd%d" % i))
+
+    device.poll()
+    assert transport.written == [b'cmd0\xff\xff\xffcmd1\xff\xff\xff']
+    transport.incoming.append(ACK)
+    device.poll()
+    assert transport.written[-1] == b'cmd2\xff\xff\xff'
+
+
+def test_poll_write_size_limit():
+    transport = FakeTransport()
+    device = NexDevice(transport, max_in_flight=10, max_write_size=16)
+    for i in range(5):
+        device._on_enqueue_command(Command("cmd%d" % i))
+
+    device.poll()
+    assert transport.written == [
+        b'cmd0\xff\xff\xffcmd1\xff\xff\xff',
+        b'cmd2\xff\xff\xffcmd3\xff\xff\xff',
+        b'cmd4\xff\xff\xff'
+    ]
+
+
+class AckTransport(FakeTransport):
+    """ Acknowledges every command written """
+
+    def write(self, data):
+        self.incoming.extend([ACK] * bytes(data).count(b'\xff\xff\xff'))
+        return super().write(data)
+
+
+def test_enqueue_while_polling():
+    transport = AckTransport()
+    device = NexDevice(transport)
+    commands = [Command("cmd%d" % i) for i in range(20000)]
+    errors = []
+
+    def enqueue():
+        for command in commands:
+            device._on_enqueue_command(command)
+
+    thread = threading.Thread(target=enqueue)
+    thread.start()
+    try:
+        while thread.is_alive():
+            device.poll()
+    except RuntimeError as e:
+        errors.append(e)
+    thread.join()
+    assert not errors
+    while not device.poll():
+        pass
+    assert all(command.status == CommandBase.Status.SUCCESSFUL for command in commands)
+
+
+def test_poll_unsolicited_events():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    command = Command("cmd0")
+    device._on_enqueue_command(command)
+    device.poll()
+
+    # Sleep, malformed touch event, unknown code, wake up: none of them answers the command or stops polling
+    transport.incoming.extend((b'\x86\xff\xff\xff', b'\x65\x01\x02\x07\xff\xff\xff', b'\x55\xff\xff\xff',
+                               b'\x87\xff\xff\xff'))
+    assert not device.poll()
+    assert command.status == CommandBase.Status.SENT
+    transport.incoming.append(ACK)
+    assert device.poll()
+    assert command.status == CommandBase.Status.SUCCESSFUL
+
+
+def test_event_poller_wakes_up():
+    master, slave = os.openpty()
+    transport = PySerialNex(os.ttyname(slave), baudrate=115200, timeout=0)
+    device = NexDevice(transport)
+    # A long interval: the poller must not depend on it
+    poller = NexEventPoller(device, 10000)
+    thread = threading.Thread(target=poller.run)
+    thread.start()
+    try:
+        time.sleep(0.1)
+        command = Command("cmd")
+        device._on_enqueue_command(command)
+        data = b''
+        while not data.endswith(b'\xff\xff\xff'):
+            data += os.read(master, 1024)
+        assert data == b'cmd\xff\xff\xff'
+
+        os.write(master, ACK)
+        deadline = time.monotonic() + 5
+        while command.status != CommandBase.Status.SUCCESSFUL and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert command.status == CommandBase.Status.SUCCESSFUL
+    finally:
+        poller.stop()
+        thread.join(5)
+        transport.close()
+        os.close(slave)
+        os.close(master)
+    assert not thread.is_alive()
+
+
+def test_refresh_interval():
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "n0", 1, val=1)
+    device = NexDevice(SimulatedNex(simulator))
+    n0 = device.hook_page("page0", pid=0).hook_widget("number", "n0", 1)
+    n0.REFRESH_VARIABLES = ("val",)
+    device.init()
+    device.refresh_interval = 60.0
+    executed = simulator.instructions
+
+    for _ in range(100):
+        device.poll()
+    # A single refresh (get n0.val), the next one is due after refresh_interval
+    assert simulator.instructions == executed + 1
+    assert 59.0 < device.next_refresh_delay() <= 60.0
+    device.refresh_interval = None
+    for _ in range(100):
+        device.poll()
+    assert simulator.instructions > executed + 10
+
+
+def test_event_poller_refresh_interval():
+    master, slave = os.openpty()
+    transport = PySerialNex(os.ttyname(slave), baudrate=115200, timeout=0)
+    device = NexDevice(transport)
+    n0 = device.hook_page("page0", pid=0).hook_widget("number", "n0", 1)
+    n0.REFRESH_VARIABLES = ("val",)
+    gets = []
+    running = True
+
+    def display():
+        """ Answer everything, as a display in bkcmd=3 mode """
+        data = b''
+        while running:
+            try:
+                data += os.read(master, 1024)
+            except BlockingIOError:
+                time.sleep(0.001)
+                continue
+            *commands, data = data.split(b'\xff\xff\xff')
+            for command in commands:
+                if command.startswith(b'get'):
+                    gets.append(time.monotonic())
+                    os.write(master, b'\x71\x01\x00\x00\x00\xff\xff\xff')
+                os.write(master, ACK)
+
+    os.set_blocking(master, False)
+    display_thread = threading.Thread(target=display)
+    display_thread.start()
+    poller = NexEventPoller(device, 100)
+    # Run in this thread: widgets enqueue their commands through Qt signals, queued across threads
+    stopper = threading.Timer(0.55, poller.stop)
+    try:
+        device.init()
+        stopper.start()
+        poller.run()
+    finally:
+        stopper.cancel()
+        running = False
+        display_thread.join(5)
+        transport.close()
+        os.close(slave)
+        os.close(master)
+    # Back to back refreshes would be hundreds
+    assert 3 <= len(gets) <= 7
+    # Rate limited by the poller, not by changing the device
+    assert device.refresh_interval is None
+
+
+def test_page_fetch():
+    transport = FakeTransport()
+    device = NexDevice(transport, max_in_flight=8)
+    page = device.hook_page("page0", pid=0)
+    page.hook_widgets((("number", "n0", 1), ("number", "n1", 2), ("text", "t0", 3)))
+
+    fetch = page.fetch(["n0.val", "n1.val", "t0.txt"])
+    device.poll()
+    # Back to back in a single write
+    assert transport.written == [b'get n0.val\xff\xff\xffget n1.val\xff\xff\xffget t0.txt\xff\xff\xff']
+    transport.incoming.extend((
+        b'\x71\x05\x00\x00\x00\xff\xff\xff', ACK,
+        b'\x71\xff\xff\xff\xff\xff\xff\xff', ACK,
+        b'\x70abc\xff\xff\xff', ACK
+    ))
+    assert not fetch.completed
+    device.poll()
+    assert fetch.status == CommandBase.Status.SUCCESSFUL
+    assert fetch.result == {"n0.val": 5, "n1.val": -1, "t0.txt": "abc"}
+    assert page["n1"]._properties_cache["val"] == -1
+
+
+def test_refresh_on_touch():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    device.refresh_on_touch = True
+    device.trailing_refresh_delay = 0.05
+    page = device.hook_page("page0", pid=0)
+    slider, text = page.hook_widgets((("slider", "h0", 1), ("text", "t0", 2)))
+    slider.REFRESH_VARIABLES = ("val",)
+    text.REFRESH_VARIABLES = ("txt",)
+    device._initialized = True
+    device._current_page = page
+
+    # Idle: nothing is refreshed
+    assert device.poll()
+    assert device.next_refresh_delay() is None
+    assert transport.written == []
+
+    # Touch press on h0
+    transport.incoming.append(b'\x65\x00\x01\x01\xff\xff\xff')
+    device.poll()
+    assert transport.written == [b'get h0.val\xff\xff\xff']
+    transport.incoming.extend((b'\x71\x07\x00\x00\x00\xff\xff\xff', ACK))
+    assert device.poll()
+    assert slider._properties_cache["val"] == 7
+
+    # Release, then the trailing refresh
+    transport.incoming.append(b'\x65\x00\x01\x00\xff\xff\xff')
+    device.poll()
+    assert transport.written[-1] == b'get h0.val\xff\xff\xff'
+    assert 0 < device.next_refresh_delay() <= 0.05
+    transport.incoming.extend((b'\x71\x08\x00\x00\x00\xff\xff\xff', ACK))
+    assert device.poll()
+    assert len(transport.written) == 2
+    time.sleep(0.06)
+    device.poll()
+    assert len(transport.written) == 3
+    transport.incoming.extend((b'\x71\x08\x00\x00\x00\xff\xff\xff', ACK))
+    assert device.poll()
+    assert device.next_refresh_delay() is None
+    assert all(data.startswith(b'get h0') for data in transport.written)
+
+
+def test_refresh_on_touch_page_change():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    device.refresh_on_touch = True
+    device.trailing_refresh_delay = 0.05
+    page0 = device.hook_page("page0", pid=0)
+    device.hook_page("page1", pid=1)
+    b0, h0 = page0.hook_widgets((("button", "b0", 1), ("slider", "h0", 2)))
+    b0.REFRESH_VARIABLES = ("txt",)
+    h0.REFRESH_VARIABLES = ("val",)
+    device._initialized = True
+    device._current_page = page0
+
+    # The release of h0 queues a trailing refresh, the one of b0 changes page
+    transport.incoming.append(b'\x65\x00\x02\x00\xff\xff\xff')
+    device.poll()
+    assert transport.written == [b'get h0.val\xff\xff\xff']
+    transport.incoming.extend((b'\x71\x08\x00\x00\x00\xff\xff\xff', ACK))
+    assert device.poll()
+    b0.released.connect(lambda: device.select_page(1))
+    transport.incoming.append(b'\x65\x00\x01\x00\xff\xff\xff')
+    device.poll()
+    # Neither b0 nor h0, no longer shown, are read
+    assert transport.written[-1] == b'page 1\xff\xff\xff'
+    time.sleep(0.06)
+    transport.incoming.append(ACK)
+    assert device.poll()
+    assert device.next_refresh_delay() is None
+    assert len(transport.written) == 2
+
+
+def test_set_property_coalescing():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    n0, t0 = page.hook_widgets((("number", "n0", 1), ("text", "t0", 2)))
+
+    for value in range(100):
+        n0.value = value
+    device.poll()
+    # Only the newest value goes out
+    assert transport.written == [b'n0.val=99\xff\xff\xff']
+    assert len(device._commands) == 1
+
+    # In flight: a new command is queued and then updated
+    for value in range(100, 200):
+        n0.value = value
+    assert len(device._commands) == 2
+    transport.incoming.append(ACK)
+    device.poll()
+    assert n0.value == 99
+    assert transport.written[-1] == b'n0.val=199\xff\xff\xff'
+    transport.incoming.append(ACK)
+    assert device.poll()
+    assert n0.value == 199
+
+    # Already there
+    n0.value = 199
+    t0.text = "abc"
+    device.poll()
+    assert transport.written[-1] == b't0.txt=abc\xff\xff\xff'
+    transport.incoming.append(ACK)
+    assert device.poll()
+    assert t0.text == "abc"
+    t0.text = "abc"
+    assert device.poll()
+    assert len(transport.written) == 3
+
+
+class SlowTransport(FakeTransport):
+    """ Signals when a write starts and makes it last a while """
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+
+    def write(self, data):
+        self.writing.set()
+        time.sleep(0.1)
+        return super().write(data)
+
+
+def test_set_property_while_sending():
+    transport = SlowTransport()
+    device = NexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    n0, = page.hook_widgets((("number", "n0", 1),))
+
+    n0.value = 1
+    thread = threading.Thread(target=device.poll)
+    thread.start()
+    # Changed while the first command is being written: it must not be updated, the new value goes in a new command
+    transport.writing.wait(5)
+    n0.value = 7
+    thread.join()
+    transport.incoming.append(ACK)
+    device.poll()
+    transport.incoming.append(ACK)
+    assert device.poll()
+    assert transport.written == [b'n0.val=1\xff\xff\xff', b'n0.val=7\xff\xff\xff']
+    assert n0.value == 7
+
+
+def test_set_property_failed():
+    transport = FakeTransport()
+    device = NexDevice(transport, max_in_flight=2)
+    page = device.hook_page("page0", pid=0)
+    n0, t0 = page.hook_widgets((("number", "n0", 1), ("text", "t0", 2)))
+    failed = []
+    n0.command_failed.connect(failed.append)
+
+    n0.value = 5
+    t0.text = "abc"
+    device.poll()
+    # Invalid assignment, then the ack of the second command
+    transport.incoming.extend((b'\x1c\xff\xff\xff', ACK))
+    assert device.poll()
+    assert len(failed) == 1 and failed[0].status == CommandBase.Status.ERROR
+    assert "val" not in n0._properties_cache and not n0._pending_sets
+    assert t0.text == "abc"
+
+    # Not in the cache: sent again
+    n0.value = 5
+    device.poll()
+    assert transport.written[-1] == b'n0.val=5\xff\xff\xff'
+
+
+def test_get_property_deduplication():
+    transport = FakeTransport()
+    device = NexDevice(transport)
+    page = device.hook_page("page0", pid=0)
+    n0, = page.hook_widgets((("number", "n0", 1),))
+
+    first = n0.get("val")
+    assert n0.get("val") is first
+    assert n0._refresh_internal("val") is first
+    for _ in range(10):
+        n0.refresh()
+    assert len(device._commands) == 1
+
+    device.poll()
+    transport.incoming.extend((b'\x71\x05\x00\x00\x00\xff\xff\xff', ACK))
+    assert device.poll()
+    assert first.result == 5
+
+    # Completed: a new read is enqueued, which later gets attach to
+    refresh = n0._refresh_internal("val")
+    assert refresh is not first
+    assert n0.get("val") is refresh
+    assert len(device._commands) == 1
+    assert transport.written == [b'get n0.val\xff\xff\xff']
+
+
+class BaudrateTransport(FakeTransport):
+    """ Answers sendme only if both sides use the same rate. The device accepts rates up to max_baudrate, but its
+        responses only get through up to max_link_baudrate.
+    """
+    def __init__(self, max_baudrate, max_link_baudrate):
+        super().__init__()
+        self.baudrate = self.device_baudrate = 9600
+        self.max_baudrate = max_baudrate
+        self.max_link_baudrate = max_link_baudrate
+
+    def set_baudrate(self, baudrate):
+        self.baudrate = baudrate
+        self.incoming.clear()
+
+    def write(self, data):
+        super().write(data)
+        if self.baudrate != self.device_baudrate:
+            return len(data)
+        if data.startswith(b'baud=') or data.startswith(b'bauds='):
+            baudrate = int(data[data.index(b'=') + 1:-3])
+            if baudrate <= self.max_baudrate:
+                self.device_baudrate = baudrate
+        elif data == b'sendme\xff\xff\xff' and self.baudrate <= self.max_link_baudrate:
+            self.incoming.extend((b'\x66\x00\xff\xff\xff', ACK))
+        return len(data)
+
+
+def test_negotiate_baudrate(monkeypatch):
+    monkeypatch.setattr(NexDevice, "BAUDRATE_SWITCH_DELAY", 0)
+    monkeypatch.setattr(NexDevice, "PROBE_TIMEOUT", 0.01)
+
+    transport = BaudrateTransport(921600, 921600)
+    device = NexDevice(transport)
+    assert device.negotiate_baudrate(921600) == 921600
+    assert transport.baudrate == transport.device_baudrate == 921600
+
+    # Not supported by the device, which keeps the current rate
+    transport = BaudrateTransport(115200, 921600)
+    device = NexDevice(transport)
+    assert device.negotiate_baudrate((921600, 512000, 115200), persistent=True) == 115200
+    assert transport.baudrate == transport.device_baudrate == 115200
+    assert b'bauds=921600\xff\xff\xff' in transport.written
+
+    # Supported by the device, but not by the link: the device is switched back
+    transport = BaudrateTransport(921600, 512000)
+    device = NexDevice(transport)
+    assert device.negotiate_baudrate((921600, 512000)) == 512000
+    assert transport.baudrate == transport.device_baudrate == 512000
+    assert not device._commands
+
+    with pytest.raises(Exception):
+        device.negotiate_baudrate(12345)
+
+
+def test_negotiate_baudrate_lost(monkeypatch):
+    monkeypatch.setattr(NexDevice, "BAUDRATE_SWITCH_DELAY", 0)
+    monkeypatch.setattr(NexDevice, "PROBE_TIMEOUT", 0.01)
+    transport = BaudrateTransport(921600, 115200)
+    device = NexDevice(transport)
+    # Lost: no response gets through any more
+    transport.max_link_baudrate = 0
+    with pytest.raises(NexBaudrateException):
+        device.negotiate_baudrate(921600)
+
+
+def test_stats():
+    transport = FakeTransport()
+    device = NexDevice(transport, max_in_flight=2)
+    commands = [Command("cmd%d" % i) for i in range(3)]
+    for command in commands:
+        device._on_enqueue_command(command)
+    device.poll()
+    transport.incoming.extend((ACK, ACK))
+    device.poll()
+    assert commands[0].enqueued_at <= commands[0].sent_at <= commands[0].completed_at
+
+    stats = device.stats(reset=True)
+    assert stats["max_queue_depth"] == 3
+    assert stats["queue_depth"] == 1
+    assert stats["written"]["frames"] == 3
+    assert stats["written"]["bytes"] == 21
+    assert stats["read"]["bytes"] == 8
+    assert stats["commands"]["Command"]["successful"] == 2
+    assert stats["commands"]["Command"]["total"]["count"] == 2
+    assert device.stats()["written"]["frames"] == 0
+
+    # A batch counts as the commands it writes
+    device._on_enqueue_command(CommandBatch(b'a\xff\xff\xffb\xff\xff\xffc\xff\xff\xff', 3))
+    transport.incoming.append(ACK)
+    device.poll()
+    assert device.stats()["written"]["frames"] == 3
@@ -0,0 +1,66 @@
+from pynextion.color import NamedColor
+from pynextion.commands import CommandBase
+from pynextion.constants import Background
+from pynextion.device import NexDevice
+from pynextion.draw import DisplayList, line
+from pynextion.simulator import NexSimulator, SimulatedNex
+
+
+def test_display_list_batches():
+    display_list = DisplayList(max_size=64)
+    display_list.cls(NamedColor.BLACK)
+    line(display_list, 0, 0, 10, 10, NamedColor.RED)
+    display_list.rectangle(1, 2, 11, 22, NamedColor.BLUE, mode=Background.SOLIDCOLOUR)
+    for x in range(10):
+        display_list.line(x, 0, x, 100, NamedColor.GRAY)
+    assert len(display_list) == 13
+
+    batches = display_list.batches()
+    assert all(len(data) <= 64 for data, _ in batches)
+    assert sum(size for _, size in batches) == 13
+    assert batches[0][0].startswith(b'cls 0\xff\xff\xffline 0,0,10,10,63488\xff\xff\xfffill 1,2,10,20,31\xff\xff\xff')
+    # Cached until modified
+    assert display_list.batches() is batches
+    display_list.clear()
+    assert display_list.encode() == b''
+
+
+def test_device_draw():
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    device = NexDevice(SimulatedNex(simulator))
+    device.hook_page("page0", pid=0)
+    device.init()
+
+    display_list = DisplayList()
+    for y in range(0, 320, 4):
+        display_list.line(0, y, 479, y, NamedColor.GRAY)
+    for _ in range(2):
+        group = device.draw(display_list)
+        assert len(group.commands) > 1
+        while not device.poll():
+            pass
+        assert group.status == CommandBase.Status.SUCCESSFUL
+    assert len(simulator.drawn) == 160
+    assert simulator.drawn[-1] == "line 0,316,479,316,33840"
+
+
+def test_device_draw_error():
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    device = NexDevice(SimulatedNex(simulator), max_in_flight=4)
+    device.hook_page("page0", pid=0)
+    device.init()
+
+    display_list = DisplayList()
+    display_list.line(0, 0, 10, 10, NamedColor.GRAY)
+    display_list.append(b'bogus\xff\xff\xff')
+    display_list.line(0, 10, 10, 20, NamedColor.GRAY)
+    group = device.draw(display_list)
+    after = device.cls(NamedColor.BLACK)
+    while not device.poll():
+        pass
+    # The error fails the batch but does not shift the responses of the following commands
+    assert group.status == CommandBase.Status.ERROR
+    assert after.status == CommandBase.Status.SUCCESSFUL
+    assert simulator.drawn == ["line 0,0,10,10,33840", "line 0,10,10,20,33840", "cls 0"]
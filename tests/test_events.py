@@ -9,8 +9,12 @@ from pynextion.events import (
     StringHeadEvent,
     NumberHeadEvent,
     CommandSucceeded,
+    CommandFailed,
     EmptyMessage,
-    EventLaunched
+    EventLaunched,
+    EVENT_SLEEP_MODE,
+    EVENT_WAKE_UP_MODE,
+    EVENT_UPGRADED
 )
 from pynextion.exceptions import NexMessageException
 from pynextion.constants import Return
@@ -144,3 +148,64 @@ def test_NumberHeadEvent():
     assert evt.value == 0x80000000
     min_val, max_val = limits(True, 32)  # limits of int32 (signed int 32 bits)
     assert evt.signed_value == min_val
+
+
+def test_decode_fast_path():
+    assert MsgEvent.decode(memoryview(b'\x01\xff\xff\xff')) is MsgEvent.decode(b'\x01\xff\xff\xff')
+    assert MsgEvent.parse(b'\x88\xff\xff\xff') is MsgEvent.decode(b'\x88\xff\xff\xff')
+    assert MsgEvent.decode(b'\x00\x00\x00\xff\xff\xff').__class__.__name__ == "EventStartup"
+
+    evt = MsgEvent.decode(memoryview(bytearray(b'\x71\xfe\xff\xff\xff\xff\xff\xff')))
+    assert (evt.value, evt.signed_value) == (0xfffffffe, -2)
+    evt = MsgEvent.decode(memoryview(b'\x70abc\xff\xff\xff'))
+    assert evt.value == "abc"
+    evt = MsgEvent.decode(b'\x65\x01\x02\x00\xff\xff\xff')
+    assert (evt.pid, evt.cid, evt.press_event) == (1, 2, Event.Touch.Release)
+
+    # Error codes are decoded too, to fail the command they answer
+    evt = MsgEvent.decode(b'\x1a\xff\xff\xff')
+    assert evt == CommandFailed(Return.Code.INVALID_VARIABLE) and not evt.issuccess()
+    assert MsgEvent.decode(b'\x02\xff\xff\xff') is MsgEvent.decode(b'\x02\xff\xff\xff')
+    assert MsgEvent.decode(b'\x00\xff\xff\xff').code is Return.Code.INVALID_CMD
+    with pytest.raises(NexMessageException):
+        MsgEvent.parse(b'\x1a\xff\xff\xff')
+    with pytest.raises(NexMessageException):
+        MsgEvent.decode(b'\x65\x01\x02\x07\xff\xff\xff')
+    with pytest.raises(NotImplementedError):
+        MsgEvent.decode(b'\x55\xff\xff\xff')
+
+    # Device state events
+    assert MsgEvent.decode(b'\x86\xff\xff\xff') is EVENT_SLEEP_MODE
+    assert MsgEvent.decode(b'\x87\xff\xff\xff') is EVENT_WAKE_UP_MODE
+    assert MsgEvent.parse(b'\x89\xff\xff\xff') is EVENT_UPGRADED
+
+
+def test_parse_checks():
+    with pytest.raises(NexMessageException):
+        MsgEvent.parse(b'\x71\x01\x00\x00\xff\xff\xff')
+    with pytest.raises(NexMessageException):
+        MsgEvent.parse(b'\x01\xff\xff')
+    with pytest.raises(NexMessageException):
+        NumberHeadEvent.parse(b'\x70\x01\x00\x00\x00\xff\xff\xff')
+
+
+def test_events_are_slotted_values():
+    frames = [
+        b'\x65\x00\x02\x01\xff\xff\xff',
+        b'\x66\x02\xff\xff\xff',
+        b'\x67\x00\x7a\x00\x1e\x01\xff\xff\xff',
+        b'\x68\x00\x7a\x00\x1e\x01\xff\xff\xff',
+        b'\x70abc\xff\xff\xff',
+        b'\x71\x39\x30\x00\x00\xff\xff\xff',
+    ]
+    for frame in frames:
+        evt = MsgEvent.decode(frame)
+        assert not hasattr(evt, "__dict__")
+        assert evt == MsgEvent.decode(bytearray(frame))
+        assert hash(evt) == hash(MsgEvent.decode(frame))
+        with pytest.raises(AttributeError):
+            evt.extra = 1
+
+    assert MsgEvent.decode(frames[0]) != MsgEvent.decode(b'\x65\x00\x02\x00\xff\xff\xff')
+    assert PositionHeadEvent.decode(frames[2]) != SleepPositionHeadEvent.decode(frames[2])
+    assert repr(MsgEvent.decode(frames[1])) == "CurrentPageIDHeadEvent(<Code.CURRENT_PAGE_ID_HEAD: 102>, 2)"
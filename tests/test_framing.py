@@ -0,0 +1,114 @@
+from pynextion.framing import FrameDecoder
+from pynextion.hardware import PySerialNex
+
+
+def test_decoder_split():
+    decoder = FrameDecoder()
+    decoder.feed(b'\x01\xff\xff\xff\x66\x02\xff\xff\xff')
+    frame = decoder.next_frame()
+    assert isinstance(frame, memoryview)
+    assert frame == b'\x01\xff\xff\xff'
+    assert decoder.next_frame() == b'\x66\x02\xff\xff\xff'
+    assert decoder.next_frame() is None
+    assert len(decoder) == 0
+
+
+def test_decoder_partial():
+    decoder = FrameDecoder()
+    decoder.feed(b'\x70abc\xff')
+    assert decoder.next_frame() is None
+    decoder.feed(b'\xff\xff\x01')
+    assert decoder.next_frame() == b'\x70abc\xff\xff\xff'
+    assert decoder.next_frame() is None
+    assert len(decoder) == 1
+
+
+def test_decoder_reuse_and_grow():
+    decoder = FrameDecoder(16)
+    # Wraps around without growing
+    for _ in range(100):
+        decoder.feed(b'\x01\xff\xff\xff' * 4)
+        assert [bytes(decoder.next_frame()) for _ in range(4)] == [b'\x01\xff\xff\xff'] * 4
+    assert decoder.capacity == 16
+
+    # A burst larger than the buffer
+    burst = b'\x65\x00\x02\x01\xff\xff\xff' * 50
+    decoder.feed(burst[:5])
+    held = decoder.next_frame()
+    assert held is None
+    decoder.feed(burst[5:])
+    assert decoder.capacity >= len(burst)
+    frames = []
+    while True:
+        frame = decoder.next_frame()
+        if frame is None:
+            break
+        frames.append(bytes(frame))
+    assert frames == [b'\x65\x00\x02\x01\xff\xff\xff'] * 50
+
+
+def test_decoder_grow_with_exported_frame():
+    decoder = FrameDecoder(8)
+    decoder.feed(b'\x01\xff\xff\xff\x70a')
+    frame = decoder.next_frame()
+    # Growing must not fail even if a frame is still referenced
+    decoder.feed(b'bcdefghijklmnop\xff\xff\xff')
+    assert frame == b'\x01\xff\xff\xff'
+    assert decoder.next_frame() == b'\x70abcdefghijklmnop\xff\xff\xff'
+
+
+def test_read_next_bulk():
+    transport = PySerialNex("loop://")
+    transport.write(b'\x01\xff\xff\xff' * 3 + b'\x71\x01\x00\x00\x00\xff\xff\xff')
+    assert transport.read_next() == b'\x01\xff\xff\xff'
+    assert transport.read_next() == b'\x01\xff\xff\xff'
+    assert transport.read_next() == b'\x01\xff\xff\xff'
+    assert transport.read_next() == b'\x71\x01\x00\x00\x00\xff\xff\xff'
+    assert transport.read_next() == b''
+    transport.close()
+
+
+def test_decoder_ff_in_payload():
+    decoder = FrameDecoder()
+    # NUMBER_HEAD carrying -1 followed by an ack
+    decoder.feed(b'\x71\xff\xff\xff\xff\xff\xff\xff\x01\xff\xff\xff')
+    assert decoder.next_frame() == b'\x71\xff\xff\xff\xff\xff\xff\xff'
+    assert decoder.next_frame() == b'\x01\xff\xff\xff'
+
+
+def test_decoder_startup_frame():
+    decoder = FrameDecoder()
+    decoder.feed(b'\x00\x00\x00\xff\xff\xff\x88\xff\xff\xff\x00\xff\xff\xff')
+    assert decoder.next_frame() == b'\x00\x00\x00\xff\xff\xff'
+    assert decoder.next_frame() == b'\x88\xff\xff\xff'
+    assert decoder.next_frame() == b'\x00\xff\xff\xff'
+
+
+def test_decoder_resync():
+    decoder = FrameDecoder()
+    # Line noise, an ack with a corrupted terminator, then valid frames
+    decoder.feed(b'\xaa\x55\xff\x01\xfe\xff\xff\x65\x00\x02\x01\xff\xff\xff\x01\xff\xff\xff')
+    assert decoder.next_frame() == b'\x65\x00\x02\x01\xff\xff\xff'
+    assert decoder.next_frame() == b'\x01\xff\xff\xff'
+    assert decoder.next_frame() is None
+    assert decoder.discarded == 7
+
+
+def test_decoder_resumable_string():
+    decoder = FrameDecoder()
+    payload = b'\x70' + b'x' * 1000 + b'\xff\xff\xff'
+    # Byte by byte, terminator split across calls
+    for i in range(len(payload) - 1):
+        decoder.feed(payload[i:i + 1])
+        assert decoder.next_frame() is None
+    decoder.feed(payload[-1:])
+    assert decoder.next_frame() == payload
+
+
+def test_read_next_partial_does_not_block():
+    transport = PySerialNex("loop://", timeout=None)
+    transport.write(b'\x66\x02\xff')
+    assert transport.read_next() == b''
+    transport.write(b'\xff\xff')
+    assert transport.read_next() == b'\x66\x02\xff\xff\xff'
+    transport.close()
@@ -0,0 +1,48 @@
+from pynextion.color import NamedColor
+from pynextion.scene import Scene
+
+
+def _frame(scene, value):
+    # Static grid
+    for x in range(0, 480, 60):
+        scene.line(x, 0, x, 319, NamedColor.GRAY)
+    scene.xstr("%d" % value, 200, 100, 60, 30)
+    scene.rectangle(10, 10, 50, 50, NamedColor.RED)
+    return scene.render()
+
+
+def _commands(display_list):
+    return [command.decode() for command in display_list.encode().split(b'\xff\xff\xff')[:-1]]
+
+
+def test_first_frame_is_full():
+    scene = Scene(background=NamedColor.BLACK)
+    commands = _commands(_frame(scene, 1))
+    assert commands[0] == "cls 0"
+    assert len(commands) == 1 + 8 + 2
+
+
+def test_unchanged_frame_is_empty():
+    scene = Scene()
+    _frame(scene, 1)
+    assert len(_frame(scene, 1)) == 0
+
+
+def test_changed_primitive():
+    scene = Scene(background=NamedColor.BLACK)
+    _frame(scene, 1)
+    commands = _commands(_frame(scene, 2))
+    # Old text erased, the grid line under it (x=240) redrawn, then the new text
+    assert commands == [
+        "fill 200,100,60,30,0",
+        "line 240,0,240,319,33840",
+        commands[2],
+    ]
+    assert commands[2].startswith('xstr 200,100,60,30,') and commands[2].endswith(',"2"')
+
+
+def test_invalidate():
+    scene = Scene()
+    _frame(scene, 1)
+    scene.invalidate()
+    assert len(_frame(scene, 1)) == 11
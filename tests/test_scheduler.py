@@ -0,0 +1,107 @@
+import pytest
+
+from pynextion.constants import Return
+from pynextion.device import NexDevice
+from pynextion.events import CommandSucceeded, NumberHeadEvent
+from pynextion.scheduler import RefreshScheduler
+from pynextion.simulator import NexSimulator, SimulatedNex
+from pynextion.widgets import NexPage, NexSlider
+
+
+def _page(n=2):
+    page = NexPage("page0", 0)
+    widgets = [page.hook_widget(NexSlider, "h%d" % i, i + 1) for i in range(n)]
+    for widget in widgets:
+        widget.REFRESH_VARIABLES = ("val",)
+    enqueued = []
+    page.enqueue_command.connect(enqueued.append)
+    return page, widgets, enqueued
+
+
+def _answer(command, value):
+    command.mark_sent()
+    command.event(NumberHeadEvent(Return.Code.NUMBER_HEAD, value, value))
+    command.event(CommandSucceeded())
+
+
+def test_scheduler_adapts_period(clock):
+    scheduler = RefreshScheduler(period=0.1, min_period=0.05, max_period=1.0, clock=clock)
+    page, (h0, h1), enqueued = _page()
+
+    assert scheduler.refresh(page) == 2
+    # Pending commands are not enqueued twice
+    assert scheduler.refresh(page) == 0
+    assert scheduler.next_refresh_delay(page) is None
+    _answer(enqueued[0], 1)
+    _answer(enqueued[1], 1)
+    assert scheduler.next_refresh_delay(page) == pytest.approx(0.05)
+
+    # h0 keeps changing, h1 does not
+    value = 1
+    for _ in range(10):
+        clock.now += 1.0
+        enqueued.clear()
+        scheduler.refresh(page)
+        value += 1
+        for command in enqueued:
+            _answer(command, value if command.command.startswith(b'get h0') else 1)
+
+    entry0 = scheduler._entry(h0, "val")
+    entry1 = scheduler._entry(h1, "val")
+    assert entry0.period == pytest.approx(0.05)
+    assert entry1.period == pytest.approx(1.0)
+    assert h0._properties_cache["val"] == value
+
+
+def test_scheduler_budget_and_priority(clock):
+    page, (h0, h1), enqueued = _page()
+    cost = len("get h0.val") + 3 + RefreshScheduler.RESPONSE_SIZE
+    scheduler = RefreshScheduler(link_budget=cost * 1.5, clock=clock)
+    scheduler.configure(h1, "val", priority=10)
+
+    assert scheduler.refresh(page) == 1
+    assert enqueued[0].command == b'get h1.val\xff\xff\xff'
+    assert scheduler.refresh(page) == 0
+    delay = scheduler.next_refresh_delay(page)
+    assert 0 < delay <= 1.0
+    clock.now += delay + 1e-6
+    assert scheduler.refresh(page) == 1
+    assert enqueued[1].command == b'get h0.val\xff\xff\xff'
+
+
+def test_scheduler_page_switch(clock):
+    scheduler = RefreshScheduler(clock=clock)
+    page, _, enqueued = _page()
+    page.show()
+    assert scheduler.refresh(page) == 0
+
+
+def test_scheduler_failed_refresh(clock):
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "h0", 1, val=42)
+    device = NexDevice(SimulatedNex(simulator), max_in_flight=4)
+    h0 = device.hook_page("page0", pid=0).hook_widget(NexSlider, "h0", 1)
+    device.init()
+    h0.REFRESH_VARIABLES = ("nosuch", "val")
+    device.refresh_scheduler = RefreshScheduler(period=0.1, min_period=0.05, max_period=1.0, clock=clock)
+
+    # The first poll enqueues the refreshes, the second one sends them and the third one gets the responses
+    for _ in range(3):
+        device.poll()
+    # Failed refreshes are retried after max_period, the others go on as usual
+    assert device.refresh_scheduler._entry(h0, "nosuch").due == clock.now + 1.0
+    # A new value was read: period halved
+    assert device.refresh_scheduler._entry(h0, "val").due == pytest.approx(clock.now + 0.05)
+    assert h0._properties_cache["val"] == 42
+
+
+def test_scheduler_widget_hooked_later(clock):
+    scheduler = RefreshScheduler(clock=clock)
+    page, _, enqueued = _page()
+    assert scheduler.refresh(page) == 2
+
+    h2 = page.hook_widget(NexSlider, "h2", 3)
+    h2.REFRESH_VARIABLES = ("val",)
+    assert scheduler.refresh(page) == 1
+    assert enqueued[-1].command == b'get h2.val\xff\xff\xff'
@@ -0,0 +1,104 @@
+from pynextion.device import NexDevice
+from pynextion.simulator import NexSimulator, SimulatedNex
+
+
+def test_get_and_set(simulated_device, drain):
+    simulator, device = simulated_device
+    page = device["page0"]
+    assert simulator.mode.value == 3
+    assert simulator.current_page.pid == 0
+
+    fetch = page.fetch(["n0.val", "t0.txt"])
+    drain(device)
+    assert fetch.result == {"n0.val": 42, "t0.txt": "hello"}
+
+    page["n0"].value = -7
+    page["t0"].text = "abc"
+    drain(device)
+    assert simulator.pages[0].components["n0"].attributes["val"] == -7
+    assert simulator.pages[0].components["t0"].attributes["txt"] == "abc"
+
+
+def test_error_reply_pipelined(simulated_device, drain):
+    simulator, device = simulated_device
+    n0 = device["page0"]["n0"]
+    # Both sent at once, the error reply must not shift the following responses
+    bad = n0.get("nosuch")
+    good = n0.get("val")
+    drain(device)
+    assert bad.status == bad.Status.ERROR
+    assert good.status == good.Status.SUCCESSFUL
+    assert good.result == 42
+
+
+def test_touch(simulated_device, drain):
+    simulator, device = simulated_device
+    events = []
+    device["page0"]["b0"].pressed.connect(lambda: events.append("pressed"))
+    device["page0"]["b0"].released.connect(lambda: events.append("released"))
+    simulator.touch("b0")
+    simulator.touch(3, pressed=False)
+    drain(device)
+    assert events == ["pressed", "released"]
+
+
+def test_page_and_drawing(simulated_device, drain):
+    simulator, device = simulated_device
+    device.select_page(1)
+    drain(device)
+    assert simulator.current_page.pid == 1
+    device.get_current_page()
+    drain(device)
+    assert device.current_page is device["page1"]
+
+    device.transport.write(b'fill 0,0,10,10,63488\xff\xff\xff')
+    assert simulator.drawn == ["fill 0,0,10,10,63488"]
+
+
+def test_timing_model(clock):
+    simulator = NexSimulator(baudrate=9600, clock=clock)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "n0", 1, val=1)
+    transport = SimulatedNex(simulator)
+    simulator.mode = simulator.mode.ALWAYS
+
+    # 13 bytes out, 8 + 4 bytes back: 25 bytes at 960 bytes/s
+    transport.write(b'get n0.val\xff\xff\xff')
+    assert transport.read_next() == b''
+    clock.now += 13 / 960.0 + 8 / 960.0 - 1e-6
+    assert transport.read_next() == b''
+    clock.now += 2e-6
+    assert transport.read_next() == b'\x71\x01\x00\x00\x00\xff\xff\xff'
+    assert transport.read_next() == b''
+    clock.now += 4 / 960.0
+    assert transport.read_next() == b'\x01\xff\xff\xff'
+
+    # Wrong baud rate: nothing gets through
+    transport.set_baudrate(115200)
+    transport.write(b'get n0.val\xff\xff\xff')
+    clock.now += 1
+    assert transport.read_next() == b''
+
+
+def test_transparent_data():
+    simulator = NexSimulator(timed=False)
+    simulator.add_page("page0", 0)
+    simulator.add_component(0, "s0", 1)
+    transport = SimulatedNex(simulator)
+    transport.write(b'addt 1,0,4\xff\xff\xff')
+    assert transport.read_next() == b'\xfe\xff\xff\xff'
+    transport.write(b'\x01\x02')
+    transport.write(b'\xff\x04add 1,1,9\xff\xff\xff')
+    assert transport.read_next() == b'\xfd\xff\xff\xff'
+    assert simulator.waveforms[(1, 0)] == [1, 2, 255, 4]
+    assert simulator.waveforms[(1, 1)] == [9]
+
+
+def test_negotiate_baudrate(monkeypatch):
+    monkeypatch.setattr(NexDevice, "BAUDRATE_SWITCH_DELAY", 0)
+    simulator = NexSimulator(baudrate=9600, timed=False)
+    simulator.add_page("page0", 0)
+    device = NexDevice(SimulatedNex(simulator))
+    device.hook_page("page0", pid=0)
+    device.init(baudrates=921600)
+    assert simulator.baudrate == device.transport.baudrate == 921600
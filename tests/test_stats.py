@@ -0,0 +1,47 @@
+import pytest
+
+from pynextion.stats import DeviceStats, Histogram
+
+
+def test_histogram():
+    histogram = Histogram(resolution=1e-3, buckets=8)
+    assert histogram.mean is None
+    assert histogram.percentile(50) is None
+
+    for value in (0.0005, 0.0015, 0.0015, 0.003, 10.0):
+        histogram.add(value)
+    assert histogram.count == 5
+    assert histogram.min == 0.0005
+    assert histogram.max == 10.0
+    assert histogram.mean == pytest.approx(10.0065 / 5)
+    # [0, 1ms), [1ms, 2ms), [2ms, 4ms), ..., the last bucket takes everything else
+    assert histogram.counts == [1, 2, 1, 0, 0, 0, 0, 1]
+    assert histogram.percentile(50) == 0.002
+    assert histogram.percentile(100) == 10.0
+    assert histogram.snapshot()["buckets"] == {0.001: 1, 0.002: 2, 0.004: 1, 0.128: 1}
+
+
+def test_device_stats_rates():
+    now = [10.0]
+    stats = DeviceStats(clock=lambda: now[0])
+    stats.written(100, 10)
+    stats.read(8)
+    stats.command_enqueued(3)
+    stats.command_enqueued(1)
+    stats.command_completed("GetPropertyCommand", True, 10.0, 10.5, 10.75, 0)
+    stats.command_completed("GetPropertyCommand", False, None, 10.5, 11.0, 0)
+    now[0] = 12.0
+
+    snapshot = stats.snapshot()
+    assert snapshot["written"]["bytes_per_sec"] == 50.0
+    assert snapshot["read"]["frames_per_sec"] == 0.5
+    assert snapshot["max_queue_depth"] == 3
+    assert snapshot["queue_depth"] == 0
+    command = snapshot["commands"]["GetPropertyCommand"]
+    assert (command["successful"], command["failed"]) == (1, 1)
+    assert command["queued"]["count"] == 1
+    assert command["response"]["count"] == 2
+    assert command["total"]["max"] == 0.75
+
+    stats.reset()
+    assert stats.snapshot()["commands"] == {}
@@ -0,0 +1,164 @@
+import pytest
+
+from pynextion.commands import AddtCommand
+from pynextion.events import MsgEvent, TRANSPARENT_DATA_FINISHED, TRANSPARENT_DATA_READY
+from pynextion.exceptions import NexCommandException
+from pynextion.waveform import Decimator, WaveformHistory, WaveformStreamer, to_samples
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# NumPy is optional, see the "numpy" extra
+requires_numpy = pytest.mark.skipif(numpy is None, reason="NumPy not installed")
+
+
+def test_transparent_data_events():
+    assert MsgEvent.parse(b'\xfe\xff\xff\xff') is TRANSPARENT_DATA_READY
+    assert MsgEvent.decode(b'\xfd\xff\xff\xff') is TRANSPARENT_DATA_FINISHED
+
+
+def test_to_samples():
+    assert to_samples([0, 12.7, -5, 300]) == b'\x00\x0c\x00\xff'
+    assert to_samples(b'\x01\x02') == b'\x01\x02'
+
+
+@requires_numpy
+def test_to_samples_numpy():
+    assert to_samples(numpy.array([-1.0, 128.5, 1000.0])) == b'\x00\x80\xff'
+    assert to_samples(numpy.arange(4, dtype=numpy.uint8)) == b'\x00\x01\x02\x03'
+
+
+def test_addt_command():
+    command = AddtCommand(1, 2, b'\x05\x06')
+    assert command.command == b'addt 1,2,2\xff\xff\xff'
+    assert not command.event(TRANSPARENT_DATA_READY)
+    assert command.event(TRANSPARENT_DATA_FINISHED)
+    assert command.status == command.Status.SUCCESSFUL
+    with pytest.raises(NexCommandException):
+        AddtCommand(1, 0, b'')
+    with pytest.raises(NexCommandException):
+        AddtCommand(1, 0, bytes(AddtCommand.MAX_SIZE + 1))
+
+
+def test_append(simulated_device, drain):
+    simulator, device = simulated_device
+    waveform = device["page0"]["s0"]
+    assert len(waveform.channels) == 4
+    command = waveform.channels[1].append(300)
+    drain(device)
+    assert command.status == command.Status.SUCCESSFUL
+    assert simulator.waveforms[(4, 1)] == [255]
+
+    # Split in transfers of at most MAX_SIZE samples, other commands wait for the transfer to finish
+    samples = [i % 256 for i in range(2500)]
+    group = waveform.channels[0].append(samples)
+    device["page0"]["n0"].value = 5
+    drain(device)
+    assert group.status == group.Status.SUCCESSFUL
+    assert len(group.commands) == 3
+    assert simulator.waveforms[(4, 0)] == list(to_samples(samples))
+    assert simulator.pages[0].components["n0"].attributes["val"] == 5
+
+
+def test_streamer(simulated_device, drain, clock):
+    simulator, device = simulated_device
+    waveform = device["page0"]["s0"]
+    streamer = WaveformStreamer(rate=64, max_chunk=8, max_backlog=20, clock=clock)
+    for chid in range(2):
+        streamer.feed(waveform.channels[chid], [chid] * 30)
+    # Oldest samples dropped
+    assert streamer.backlog(waveform.channels[0]) == 20
+    assert streamer.update() == []
+    assert streamer.next_update_delay() == 1 / 64.0
+
+    clock.now += 0.0625
+    assert len(streamer.update()) == 2
+    # The previous chunk is not acknowledged yet
+    clock.now += 0.0625
+    assert streamer.update() == []
+    assert streamer.next_update_delay() is None
+    drain(device)
+    assert simulator.waveforms[(4, 0)] == [0] * 4
+    assert simulator.waveforms[(4, 1)] == [1] * 4
+
+    # Credit is capped to a chunk
+    clock.now += 1
+    streamer.update()
+    drain(device)
+    assert len(simulator.waveforms[(4, 0)]) == 4 + 8
+    assert streamer.backlog(waveform.channels[1]) == 20 - 4 - 8
+
+
+def test_history():
+    history = WaveformHistory(5)
+    assert history.samples() == b''
+    history.extend(b'\x01\x02\x03')
+    assert history.samples() == b'\x01\x02\x03'
+    history.extend(b'\x04\x05\x06\x07')
+    assert len(history) == 5
+    assert history.samples() == b'\x03\x04\x05\x06\x07'
+    history.extend(bytes(range(10, 20)))
+    assert history.samples() == bytes(range(15, 20))
+    assert history.downsample(2) == b'\x10\x13'
+    assert history.downsample(10) == bytes(range(15, 20))
+    history.clear()
+    assert not history
+
+
+def test_replay_on_page_shown(simulated_device, drain):
+    simulator, device = simulated_device
+    waveform = device["page0"]["s0"]
+    waveform.columns = 100
+    waveform.channels[0].append(range(200))
+    waveform.channels[2].append(7)
+    drain(device)
+
+    device.select_page(1)
+    drain(device)
+    assert not simulator.waveforms
+    device.select_page(0)
+    drain(device)
+    assert simulator.waveforms[(4, 0)] == list(range(1, 200, 2))
+    assert simulator.waveforms[(4, 2)] == [7]
+    assert (4, 1) not in simulator.waveforms
+
+    # Page changed on the device
+    simulator.current_page = simulator.pages[1]
+    device.get_current_page()
+    drain(device)
+    simulator.current_page = simulator.pages[0]
+    simulator.waveforms.clear()
+    device.get_current_page()
+    drain(device)
+    assert len(simulator.waveforms[(4, 0)]) == 100
+
+
+@requires_numpy
+def test_decimator():
+    decimator = Decimator(2, Decimator.Mode.MEAN)
+    assert list(decimator([1, 3, 5])) == [2]
+    assert decimator.pending == 1
+    assert list(decimator(numpy.array([7, 10, 20]))) == [6, 15]
+
+    decimator = Decimator(3, Decimator.Mode.LAST)
+    assert list(decimator(numpy.arange(7))) == [2, 5]
+    assert list(decimator(numpy.arange(2))) == [1]
+
+    # Spikes are kept, in the order they came in
+    decimator = Decimator.for_rates(1000, 500)
+    assert decimator.factor == 2 and decimator.block_size == 4
+    samples = numpy.array([10, 250, 11, 12, 13, 12, 0, 11, 5])
+    assert list(decimator(samples)) == [10, 250, 13, 0]
+    assert decimator.pending == 1
+    decimator.reset()
+    assert decimator.pending == 0
+
+    # Same output however the input is split
+    samples = numpy.random.RandomState(0).randint(0, 256, 1000)
+    whole = Decimator(5)(samples)
+    decimator = Decimator(5)
+    parts = numpy.concatenate([decimator(part) for part in numpy.array_split(samples, 7)])
+    assert numpy.array_equal(whole, parts)
+    assert len(whole) == 200